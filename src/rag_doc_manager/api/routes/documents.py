@@ -1,15 +1,16 @@
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Header, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi import status
 from pydantic import BaseModel, HttpUrl, Field
-from typing import Optional, Type, Annotated
+from typing import Optional, Type
+import asyncio
 import uuid
 from pathlib import Path
 
 
 from rag_doc_manager.document_manager.azure_document_manager import AzureDocumentManager
 from rag_doc_manager.document_manager.base import DocumentManager
-from rag_doc_manager.utils.io import save_bytes_as_file
+from rag_doc_manager.utils.io import ensure_dir, save_stream_as_file
 from rag_doc_manager.customer_manager.remote_customer_schema_manager import CustomerIndexSchemaManager
 from rag_doc_manager.customer_manager.data_models.models import IndexConfig
 from rag_doc_manager.index_manager.index_manager import IndexManager
@@ -44,43 +45,44 @@ class IndexDocumentHeaders(BaseModel):
     scope: Optional[str] = Field(default='global', description="Scope (session, user, account, or global)")
 
 
-
-
 @router.post("/index_document")
 async def index_document(
-        headers: Annotated[IndexDocumentHeaders, Header()],
-        request: Request
+        request: Request,
+        # a header model: FastAPI validates all the headers in one call and documents them in the OpenAPI schema
+        headers: IndexDocumentHeaders = Header()
 ):
     try:
-        # construct parent dir
+        # construct parent dir (created once per process, see ensure_dir)
         user_dir = Path(headers.customer_id) / headers.user_id
-        user_dir.mkdir(exist_ok=True, parents=True)  # Added parents=True for consistency
 
         if headers.session_id:
             user_dir = user_dir / headers.session_id
 
-        user_dir.mkdir(exist_ok=True, parents=True)  # Added parents=True for consistency
+        ensure_dir(user_dir)
 
-        # save the file
-        # Fixed: You need to await the body() method and use the request object from request_with_headers
-        body_content = await request.body()
-        file_info = save_bytes_as_file(file_content=body_content, parent_dir=user_dir, file_name=headers.file_name)
+        # save the file, streaming the body to disk instead of buffering it in memory
+        file_info = await save_stream_as_file(stream=request.stream(), parent_dir=user_dir, file_name=headers.file_name)
 
-        document_manager = AzureDocumentManager(customer=headers.customer_id, account_id=headers.account_id)
+        # the Azure SDK calls below are blocking, run them off the event loop
+        document_manager = await asyncio.to_thread(
+            AzureDocumentManager, customer=headers.customer_id
+        )
 
-        document_manager.upload(
+        await asyncio.to_thread(
+            document_manager.upload,
             index_name=headers.customer_id,
             account_id=headers.account_id,
             user_id=headers.user_id,
             session_id=headers.session_id,
             file=file_info['file_path'],
-            scope=headers.scope
+            scope=headers.scope,
+            file_size=file_info['size']
         )
 
         return file_info
     except Exception as e:
         raise
-        # return JSONResponse(content={"error": str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        # return ORJSONResponse(content={"error": str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 
@@ -90,15 +92,16 @@ async def index_document(
 def delete_document(request: DeleteDocumentRequest):
     """Delete a document from the index and remove it from the storage."""
     try:
-        document_manager = AzureDocumentManager(customer=request.customer_id, account_id=request.account_id)
+        document_manager = AzureDocumentManager(customer=request.customer_id)
         document_manager.delete(
             document_id=request.document_id,
-            user_id=request.user_id
+            user_id=request.user_id,
+            account_id=request.account_id
 
         )
-        return JSONResponse(content={"message": "Document deleted successfully"}, status_code=status.HTTP_200_OK)	
+        return ORJSONResponse(content={"message": "Document deleted successfully"}, status_code=status.HTTP_200_OK)	
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return ORJSONResponse(content={"error": str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 def download_file_from_bytes():
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from fastapi import APIRouter, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from rag_doc_manager.customer_manager.remote_customer_schema_manager import CustomerIndexSchemaManager
 from rag_doc_manager.customer_manager.data_models.models import IndexConfig
 from rag_doc_manager.index_manager.index_manager import IndexManager
@@ -27,6 +27,6 @@ def create_account(request: CreateAccountRequest):
         index_manager.create_new_index(user_id = request.admin_id, client_index_schema_manager = customer_manager)
 
         #TODO: Change message when account already exists, improve error handling
-        return JSONResponse(content={"message": f"Account created successfully for customer: {request.customer_id}"}, status_code=status.HTTP_200_OK)
+        return ORJSONResponse(content={"message": f"Account created successfully for customer: {request.customer_id}"}, status_code=status.HTTP_200_OK)
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return ORJSONResponse(content={"error": str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -1,7 +1,8 @@
 from enum import Enum
+import os
+import threading
 from typing import Optional
 from fastapi import APIRouter, Depends, Query
-from fastapi.responses import JSONResponse
 from fastapi import status
 import rag_doc_manager.search as s
 
@@ -9,11 +10,32 @@ import rag_doc_manager.search as s
 router = APIRouter(prefix='/search', tags=['search'])
 
 
+# Request coalescing window for /search, see QueryBatcher
+_BATCH_MAX_SIZE = int(os.environ.get("RAG_DOC_MANAGER_SEARCH_BATCH_MAX_SIZE", 16))
+_BATCH_MAX_WAIT_MS = float(os.environ.get("RAG_DOC_MANAGER_SEARCH_BATCH_MAX_WAIT_MS", 50))
+
+_query_batcher: Optional[s.QueryBatcher] = None
+_query_batcher_lock = threading.Lock()
+
+
 # TODO: will move this to configuration
 def get_azure_query_engine():
     return s.QueryEngineFactory.get_query_engine(provider='azure')
 
 
+def get_query_batcher() -> s.QueryBatcher:
+    """Process-wide batcher coalescing concurrent searches into batched engine calls."""
+    global _query_batcher
+    with _query_batcher_lock:
+        if _query_batcher is None:
+            _query_batcher = s.QueryBatcher(
+                get_azure_query_engine(),
+                max_batch_size=_BATCH_MAX_SIZE,
+                max_wait_ms=_BATCH_MAX_WAIT_MS
+            )
+    return _query_batcher
+
+
 @router.get("/", response_model=s.SearchResponse)
 async def search_documents(
     query: str = Query(..., description="Search query text"),
@@ -24,7 +46,7 @@ async def search_documents(
     scope: Optional[str] = Query(default='global', description="scope of the search"),
     search_type: Optional[str] = Query('vector', description="Search type (text, vector, hybrid)"),
     top_k: int = Query(3, description="Number of results to return"),
-    query_engine: s.QueryEngine = Depends(get_azure_query_engine)
+    query_batcher: s.QueryBatcher = Depends(get_query_batcher)
 ):
 
     # TODO: make this configurable
@@ -35,7 +57,7 @@ async def search_documents(
         search_strategy=search_strategy,
     )
 
-    return query_engine.search(
+    return await query_batcher.search(
         index_name=customer_id,
         account_id=account_id,
         user_id=user_id,
@@ -41,6 +41,15 @@ class IndexField(BaseModel):
 class IndexSchema(BaseModel):
     fields: List[IndexField]
     vector_dimensions: Optional[int] = None
+    # HNSW graph of the vector field, defaults and bounds are the ones of Azure AI Search.
+    # A larger m or ef_construction builds a denser graph (better recall, slower indexing),
+    # a larger ef_search explores more candidates per query (better recall, slower queries).
+    hnsw_m: int = Field(default=4, ge=4, le=10)
+    hnsw_ef_construction: int = Field(default=400, ge=100, le=1000)
+    hnsw_ef_search: int = Field(default=500, ge=100, le=1000)
+    # Opt-in: keep an int8 scalar-quantized copy of the vectors for the HNSW graph (about 4x smaller),
+    # the full-precision vectors are still used to rescore the candidates but recall may drop slightly
+    scalar_quantization: bool = False
 
 class IndexConfig(BaseModel):
     """
@@ -1,7 +1,12 @@
 from typing import Optional, Dict, Any, List
+import functools
 import os
-import json
 import logging
+import threading
+import time
+
+import orjson
+from pydantic import TypeAdapter
 
 from ..customer_manager.data_models.models import IndexConfig, Customer, IndexSchemaManagerState
 from rag_doc_manager.customer_manager.data_models.models import IndexSchema, IndexField, IndexConfig, IndexingStrategyConfig
@@ -10,6 +15,9 @@ from rag_doc_manager.storage.secrets.azure_key_vault import AzureKeyVaultStore
 
 logger = logging.getLogger(__name__)
 
+# Built once so the compiled validator is reused for every stored index config
+_INDEX_CONFIG_ADAPTER = TypeAdapter(IndexConfig)
+
 
 class CustomerIndexSchemaManager:
     
@@ -21,27 +29,57 @@ class CustomerIndexSchemaManager:
     _DEFAULT_INDEX_FILE_PATH = os.path.join("data_models","default_index_schema.json")
     _COSMOSDB_DATABASE = "rag_doc_manager"
     keyvault_url = "https://kv-indcopilot-llmops-dev.vault.azure.net/"
+    _EXISTS_CACHE_TTL = 300  # seconds
+    _EXISTS_CACHE_MAXSIZE = 10000
 
     
     _instance = None
+    _lock = threading.RLock()
 
     def __new__(cls, *args, **kwargs):
         # initialize if not initialized
-        if cls._instance is None:
-            cls._instance = super(CustomerIndexSchemaManager, cls).__new__(cls)
-        return cls._instance
+        with cls._lock:
+            if cls._instance is None:
+                instance = super(CustomerIndexSchemaManager, cls).__new__(cls)
+                instance._initialized = False
+                cls._instance = instance
+            return cls._instance
 
     def __init__(self):
 
-        #TODO: Use CustomerCollection instead of CosmosDBClient
-        self.kv_client = AzureKeyVaultStore(config={"vault_url": CustomerIndexSchemaManager.keyvault_url})
-        self.cosmosdb_client = CosmosDBClient(connection_string=self.kv_client.get_secret("cosmosdb-connection-string"), database_name=CustomerIndexSchemaManager._COSMOSDB_DATABASE, collection_name=CustomerIndexSchemaManager._COSMOSDB_STATE_COLLECTION, primary_key = "customer_id")
-        self._state = None
+        # __new__ always hands back the shared instance, only connect on the first construction
+        if self._initialized:
+            return
+
+        with CustomerIndexSchemaManager._lock:
+            if self._initialized:
+                return
+
+            #TODO: Use CustomerCollection instead of CosmosDBClient
+            self.kv_client = AzureKeyVaultStore(config={"vault_url": CustomerIndexSchemaManager.keyvault_url})
+            self.cosmosdb_client = CosmosDBClient(connection_string=self.kv_client.get_secret("cosmosdb-connection-string"), database_name=CustomerIndexSchemaManager._COSMOSDB_DATABASE, collection_name=CustomerIndexSchemaManager._COSMOSDB_STATE_COLLECTION, primary_key = "customer_id")
+            self._state = None
+            # customer_id -> expiry of customers known to exist, saves a Cosmos read per mutation
+            self._known_customers: Dict[str, float] = {}
+            self._initialized = True
+
+    def _remember_customer(self, customer_id: str) -> None:
+        if len(self._known_customers) >= CustomerIndexSchemaManager._EXISTS_CACHE_MAXSIZE:
+            self._known_customers.clear()
+        self._known_customers[customer_id] = time.monotonic() + CustomerIndexSchemaManager._EXISTS_CACHE_TTL
+
+    def _forget_customer(self, customer_id: str) -> None:
+        self._known_customers.pop(customer_id, None)
 
     def customer_exists(self, customer_id: str) -> bool:
+        expires_at = self._known_customers.get(customer_id)
+        if expires_at and expires_at > time.monotonic():
+            return True
+
         try:
             record = self.cosmosdb_client.get_record(customer_id)
             if record and record.get("customer_id") == customer_id:
+                self._remember_customer(customer_id)
                 return True
             else:
                 logger.warning(f"Customer with id '{customer_id}' not found.")
@@ -59,6 +97,7 @@ class CustomerIndexSchemaManager:
         try:
             self.cosmosdb_client.insert_record(record_data= Customer(customer_id=customer_id, index_config=index_config).model_dump(), record_id= customer_id)
             logger.info(f"Registered customer: {customer_id}")   
+            self._remember_customer(customer_id)
             return True
         except Exception as e:
             #TODO: Implement better error handling
@@ -68,14 +107,18 @@ class CustomerIndexSchemaManager:
 
     def get_index_config(self, customer_id: str) -> Optional[IndexConfig]:
         """Get the index config for the customer with the given name"""
-        if self.customer_exists(customer_id):
-            customer_record = self.cosmosdb_client.get_record(record_id=customer_id)
-            if customer_record.get("index_config"):
-                return IndexConfig.parse_obj(customer_record.get("index_config"))
-            else:
-                logger.error(f"Index config for '{customer_id}' not found")
-                return None
+        # A single read both checks existence and returns the config
+        customer_record = self.cosmosdb_client.get_record(record_id=customer_id)
+        if not customer_record or customer_record.get("customer_id") != customer_id:
+            self._forget_customer(customer_id)
+            logger.warning(f"Customer with id '{customer_id}' not found.")
+            return None
+
+        self._remember_customer(customer_id)
+        if customer_record.get("index_config"):
+            return _INDEX_CONFIG_ADAPTER.validate_python(customer_record.get("index_config"))
         else:
+            logger.error(f"Index config for '{customer_id}' not found")
             return None
         
         
@@ -84,7 +127,7 @@ class CustomerIndexSchemaManager:
         """Update the index config for the customer with the given name"""
         if self.customer_exists(customer_id):
             try:
-                self.cosmosdb_client.create_or_update_record(record_id=customer_id, updated_data=Customer(customer_id=customer_id, index_config=index_config).model_dump())
+                self.cosmosdb_client.update_or_create_record(record_id=customer_id, updated_data=Customer(customer_id=customer_id, index_config=index_config).model_dump())
                 logger.info(f"Updated index config for customer: {customer_id}")
                 return True
             except Exception as e:
@@ -100,6 +143,7 @@ class CustomerIndexSchemaManager:
         if self.customer_exists(customer_id):
             try:
                 self.cosmosdb_client.delete_record(record_id=customer_id)
+                self._forget_customer(customer_id)
                 logger.info(f"Deleted customer: {customer_id}")
                 return True
             except Exception as e:
@@ -123,16 +167,22 @@ class CustomerIndexSchemaManager:
     @staticmethod
     def create_default_index() -> IndexConfig:
         """Create a default index definition for the customer with the given name"""
+        # The schema file never changes at runtime: parse it once and hand out copies
+        return CustomerIndexSchemaManager._load_default_index().model_copy(deep=True)
+
+    @staticmethod
+    @functools.cache
+    def _load_default_index() -> IndexConfig:
+        """Load the default index definition from the bundled schema file"""
         schema_file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),CustomerIndexSchemaManager._DEFAULT_INDEX_FILE_PATH)
-        with open(schema_file_path, "r") as f:
-            index_config_data = json.load(f)
+        with open(schema_file_path, "rb") as f:
+            index_config_data = orjson.loads(f.read())
         fields = [IndexField(**field_data) for field_data in index_config_data["index_fields"]]
         index_config = IndexConfig(
             index_schema=IndexSchema(fields=fields, vector_dimensions=1536),
             indexing_strategy_config=IndexingStrategyConfig(),
             description="Default index configuration."
         )
-        #self.update_index_config(customer_name, index_config)
         return index_config
 
 
@@ -1,4 +1,7 @@
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from pathlib import Path
 import logging
@@ -8,11 +11,14 @@ from rag_doc_manager.document_manager.base import DocumentManager, Scope
 from rag_doc_manager.storage.secrets.azure_key_vault import AzureKeyVaultStore
 from rag_doc_manager.storage.object.azure_blob_storage import AzureBlobStorage
 from rag_doc_manager.document_processor.embedders.factory import EmbedderFactory
+from rag_doc_manager.document_processor.embedders.cache import CachedEmbedder
 from rag_doc_manager.document_processor.processor import DocumentProcessor
 from rag_doc_manager.index.adaptors.azure_ai_indexing_engine import AISearchIndexClient
+from rag_doc_manager.index.data_models.models import IndexMetadata
 from rag_doc_manager.storage.database_manager.cosmosdb_manager import CosmosDBClient
 from rag_doc_manager.document_manager.data_models.models import DocumentRecord
 from rag_doc_manager.index_manager.index_manager import IndexManager
+from rag_doc_manager.search.cache import get_semantic_cache
 
 logger = logging.getLogger(__name__)
 
@@ -22,12 +28,26 @@ class AzureDocumentManager(DocumentManager):
     key_vault_url = 'https://kv-indcopilot-llmops-dev.vault.azure.net/'
     _DOCUMENT_COLLECTION_NAME = 'documents'
     _COSMOSDB_DATABASE = 'rag_doc_manager'
-
-    def __init__(self, customer: str, account_id: str):
-
-        super().__init__(customer)
+    # Blob prefix under which a document is stored for each scope
+    _DESTINATION_PREFIX_FORMATS = {
+        'global': '{customer}',
+        'account': '{customer}/{account_id}',
+        'user': '{customer}/{account_id}/{user_id}',
+        'session': '{customer}/{account_id}/{user_id}/{session_id}',
+    }
+    # Indexing engines are rebuilt after that many seconds, so they pick up an updated index config
+    _INDEXING_ENGINE_TTL = 60
+
+    def __init__(self, customer: str):
+        # Instances are cached per customer by DocumentManager.__new__ and shared by the requests of all
+        # its accounts, so the instance holds no account state: the account is given to each call
+        with DocumentManager._lock:
+            # concurrent first requests of the customer wait for one of them to build the clients
+            if not self._initialized:
+                self._initialize(customer)
+
+    def _initialize(self, customer: str):
         self.customer_id = customer
-        self.account_id = account_id
 
         # call all the factories and get the relevant object
         self.key_vault = AzureKeyVaultStore(
@@ -36,15 +56,24 @@ class AzureDocumentManager(DocumentManager):
             }
         )
 
-        embedder = EmbedderFactory.create_embedder(
+        secrets = self.key_vault.get_secrets([
+            "azure-openai-endpoint",
+            "blob-service-connection-string",
+            "cosmosdb-connection-string",
+            "aisearch-endpoint"
+        ])
+        self.search_service = secrets["aisearch-endpoint"]
+
+        # re-indexed or repeated chunks are served from the embeddings cache
+        embedder = CachedEmbedder(EmbedderFactory.create_embedder(
             'azure',
             #api_key=self.key_vault.get_secret("openai-api-key"),
-            endpoint=self.key_vault.get_secret("azure-openai-endpoint"),
+            endpoint=secrets["azure-openai-endpoint"],
             deployment_name='text-embedding-ada-002'
-        )
+        ))
 
         self.object_storage = AzureBlobStorage(
-            connection_string=self.key_vault.get_secret("blob-service-connection-string"),
+            connection_string=secrets["blob-service-connection-string"],
             container_name='rag-doc-manager-blob'
         )
 
@@ -54,14 +83,58 @@ class AzureDocumentManager(DocumentManager):
         )
 
         self.document_collection = CosmosDBClient(
-            connection_string=self.key_vault.get_secret("cosmosdb-connection-string"),
+            connection_string=secrets["cosmosdb-connection-string"],
             database_name=AzureDocumentManager._COSMOSDB_DATABASE,
             collection_name=AzureDocumentManager._DOCUMENT_COLLECTION_NAME,
             primary_key = "document_id"
         )
-        self.index_manager =IndexManager(
-            customer_id = self.customer, account_id = self.account_id)
+        # index_name -> (indexing engine, expiry), shared by the request threads of the customer
+        self._indexing_engines = {}
+        self._indexing_engines_lock = threading.Lock()
+        self.semantic_cache = get_semantic_cache()
+
+        # Marks the instance as initialized once all the clients have been built
+        super().__init__(customer)
+
+    def _get_index_manager(self, account_id: Optional[str]) -> IndexManager:
+        """Return an index manager for the account of the request, its secrets and database pool are shared."""
+        return IndexManager(customer_id=self.customer, account_id=account_id)
+
+    def _get_indexing_engine(self, index_name: str) -> AISearchIndexClient:
+        """Return the indexing engine for the given index, building it on first use and once expired."""
+        with self._indexing_engines_lock:
+            cached = self._indexing_engines.get(index_name)
+            if cached is not None and cached[1] > time.monotonic():
+                return cached[0]
+
+            # indexes are named after the customer, its index config gives the schema without a get_index call
+            index_config = self.customer_manager.get_index_config(index_name)
+            indexing_engine = AISearchIndexClient(
+                ais_service_name=self.search_service,
+                index_name=index_name,
+                index_metadata=IndexMetadata(name=index_name, config=index_config) if index_config else None
+            )
+            self._indexing_engines[index_name] = (indexing_engine, time.monotonic() + AzureDocumentManager._INDEXING_ENGINE_TTL)
+        if cached is not None:
+            # its search clients are shared, closing it only drops the engine
+            cached[0].close()
+        return indexing_engine
+
+    def close(self):
+        """
+        Drop the indexing engines of the instance.
 
+        Their search clients and the Cosmos DB connection pool are shared between all the instances
+        and stay open, AISearchIndexClient.close_all closes the search clients on shutdown.
+        """
+        # an instance can be evicted before its __init__ has built the clients
+        indexing_engines = getattr(self, '_indexing_engines', None)
+        if indexing_engines is None:
+            return
+        with self._indexing_engines_lock:
+            for indexing_engine, _ in indexing_engines.values():
+                indexing_engine.close()
+            indexing_engines.clear()
 
     def upload(
         self,
@@ -70,43 +143,47 @@ class AzureDocumentManager(DocumentManager):
         account_id: Optional[str] = None, # optional to make scopes optional
         user_id: Optional[str] = None,
         session_id: Optional[str] = None,
-        scope: Optional[str] = 'global'
+        scope: Optional[str] = 'global',
+        file_size: Optional[int] = None  # size in bytes if already known by the caller, saves a stat
     ):
 
-        self.indexing_engine = AISearchIndexClient(
-            ais_service_name=self.key_vault.get_secret("aisearch-endpoint"),
-            index_name=index_name
-        )
+        indexing_engine = self._get_indexing_engine(index_name)
 
         #TODO: Add file metadata
         # BUG: session_id should be optional
-        destination_prefix = f'{self.customer}'
-        print(scope)
+        logger.debug("Uploading %s with scope=%s", file, scope)
+        assert scope in AzureDocumentManager._DESTINATION_PREFIX_FORMATS, f"unknown scope: {scope}"
         if scope == 'account':
             assert account_id, "account ID must be provided for session-specific indexing"
-            destination_prefix = f'{destination_prefix}/{account_id}'
         elif scope == 'user':
             assert user_id, "user ID must be provided for user-specific indexing"
-            destination_prefix = f'{destination_prefix}/{account_id}/{user_id}'
-        elif scope == 'session':
-            destination_prefix = f'{destination_prefix}/{account_id}/{user_id}/{session_id}'
-        else:
-            assert scope == 'global'
 
-        self.object_storage.upload_file(file, destination_prefix=destination_prefix, additional_metadata={})
-        
-        chunked_documents = self.processor.process_document(
-            file_path=file,
-            account_id=account_id,
-            user_id=user_id,
-            is_global=True if scope == 'global' else False,
-            session_id=session_id
+        destination_prefix = AzureDocumentManager._DESTINATION_PREFIX_FORMATS[scope].format(
+            customer=self.customer, account_id=account_id, user_id=user_id, session_id=session_id
         )
+
+        # the blob upload and the document processing are independent network-bound steps, run them concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            upload_future = executor.submit(
+                self.object_storage.upload_file, file, destination_prefix=destination_prefix, additional_metadata={}
+            )
+            processing_future = executor.submit(
+                self.processor.process_document,
+                file_path=file,
+                account_id=account_id,
+                user_id=user_id,
+                is_global=True if scope == 'global' else False,
+                session_id=session_id
+            )
+            # the blob URL is what delete() later resolves back to the blob name
+            document_url = upload_future.result()
+            chunked_documents = processing_future.result()
         
         document_id = chunked_documents[0].document_id
 
         # index documents
-        self.indexing_engine.index_documents(documents=chunked_documents)
+        indexing_engine.index_documents(documents=chunked_documents)
+        self._invalidate_cached_searches(index_name)
         document_record = DocumentRecord(
             document_id=document_id,
             customer_id=self.customer,
@@ -115,9 +192,9 @@ class AzureDocumentManager(DocumentManager):
             user_id=user_id,
             session_id=session_id,
             scope=str(scope),
-            document_url=os.path.join(destination_prefix, file),
+            document_url=document_url,
             document_name=os.path.basename(file),
-            document_size=os.path.getsize(file),
+            document_size=file_size if file_size is not None else os.path.getsize(file),
             document_indexed=True,
             indexed_at=chunked_documents[0].created_at,
             chunk_ids=[doc.chunk_id for doc in chunked_documents]
@@ -125,9 +202,14 @@ class AzureDocumentManager(DocumentManager):
         self._update_document_record(document_record)
 
         # Update index record
-        self.index_manager.update_docs_in_index_record(document_id = document_id, action= "add")
+        self._get_index_manager(account_id).update_docs_in_index_record(document_id = document_id, action= "add")
 
 
+    def _invalidate_cached_searches(self, index_name: str) -> None:
+        """Drop the cached search responses of the index, they may no longer match its documents."""
+        if self.semantic_cache is not None:
+            self.semantic_cache.invalidate(index_name)
+
     def _update_document_record(
         self,
         document_record: DocumentRecord
@@ -162,7 +244,8 @@ class AzureDocumentManager(DocumentManager):
     def delete(
         self,
         document_id: str,
-        user_id: str
+        user_id: str,
+        account_id: Optional[str] = None
     ):
         """Deletes a document from the index in blob_storage."""
 
@@ -183,19 +266,17 @@ class AzureDocumentManager(DocumentManager):
                 self.object_storage.delete_file(file_url=document_url)
 
             #TODO: Change index name to not assume customer_id
-            self.indexing_engine = AISearchIndexClient(
-            ais_service_name=self.key_vault.get_secret("aisearch-endpoint"),
-            index_name=self.customer_id
-        )
+            indexing_engine = self._get_indexing_engine(self.customer_id)
 
             # Delete the document from the index
-            self.indexing_engine.delete_document(document_id=document_id)
+            indexing_engine.delete_document(document_id=document_id)
+            self._invalidate_cached_searches(self.customer_id)
 
             # Delete the document record from the database
             self.document_collection.delete_record(record_id=document_id)
 
             # Update index record
-            self.index_manager.update_docs_in_index_record(document_id = document_id, action= "delete")
+            self._get_index_manager(account_id).update_docs_in_index_record(document_id = document_id, action= "delete")
 
         else:
             raise Exception(f"Document with id: {document_id} not found or user is not authorized to delete the document.")
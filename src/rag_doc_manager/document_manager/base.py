@@ -1,11 +1,15 @@
 from abc import ABC, abstractmethod
-from typing import Annotated, Union
+from typing import Annotated, Optional, Union
 from pathlib import Path
+import logging
 import threading
+from collections import OrderedDict
 from enum import Enum
 
 from rag_doc_manager.customer_manager.remote_customer_schema_manager import CustomerIndexSchemaManager
 
+logger = logging.getLogger(__name__)
+
 class Scope(Enum):
 
     GLOBAL = 'global'
@@ -19,7 +23,10 @@ class DocumentManager(ABC):
 
     client_name: str
 
-    _instances = {}
+    # LRU of the instances per customer, bounded so that a long-running server does not keep
+    # the clients of every customer it has ever served
+    _instances: "OrderedDict[str, DocumentManager]" = OrderedDict()
+    _max_instances = 256
     _lock = threading.RLock()
     customer_manager = CustomerIndexSchemaManager()
 
@@ -32,12 +39,21 @@ class DocumentManager(ABC):
     # TODO: allow as many instances of DocumentManager in the future for better performance (con: memory overhead)
     def __new__(cls, customer: Annotated[str, "unique ID of the customer"], *args, **kwargs):
         with cls._lock:
-            if customer not in cls._instances:
-                instance = super(DocumentManager, cls).__new__(cls)
-                instance._initialized = False
-                instance.customer = customer
-                cls._instances[customer] = instance
-            return cls._instances[customer]
+            if customer in cls._instances:
+                cls._instances.move_to_end(customer)
+                return cls._instances[customer]
+
+            instance = super(DocumentManager, cls).__new__(cls)
+            instance._initialized = False
+            instance.customer = customer
+            cls._instances[customer] = instance
+
+            while len(cls._instances) > cls._max_instances:
+                # only the reference is dropped: requests still running on the evicted manager keep using it,
+                # its clients are released once they are garbage collected
+                evicted_customer, _ = cls._instances.popitem(last=False)
+                logger.debug(f"Evicting document manager of customer {evicted_customer}")
+            return instance
 
 
     @abstractmethod
@@ -48,7 +64,8 @@ class DocumentManager(ABC):
         account_id: Annotated[str, "Account ID under the customer"],
         user_id: Annotated[str, "User ID of the user sending request"],
         session_id: Annotated[str, "ID of the specific session (chat or another app)"],
-        scope: Annotated[Scope, "Define indexing hierarchy"]
+        scope: Annotated[Scope, "Define indexing hierarchy"],
+        file_size: Annotated[Optional[int], "Size of the file in bytes, if already known"] = None
     ):
         pass
 
@@ -66,6 +83,10 @@ class DocumentManager(ABC):
     ):
         raise NotImplementedError
 
+    def close(self):
+        """Release the clients held by the instance, called by `clear_instances`."""
+        pass
+
 
 
         
@@ -73,6 +94,8 @@ class DocumentManager(ABC):
     def clear_instances(cls):
         """Clear all instances (useful for testing)"""
         with cls._lock:
+            for instance in cls._instances.values():
+                instance.close()
             cls._instances.clear()
         
         
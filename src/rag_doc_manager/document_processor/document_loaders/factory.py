@@ -1,4 +1,5 @@
-from typing import Union
+import os
+from typing import Union, Tuple
 from pathlib import Path
 
 from langchain_community.document_loaders import (
@@ -9,10 +10,12 @@ from langchain_community.document_loaders import (
     UnstructuredExcelLoader,
     UnstructuredPowerPointLoader,
     BSHTMLLoader,
-    JSONLoader,
     UnstructuredMarkdownLoader
 )
 
+from langchain_core.document_loaders.base import BaseLoader
+
+from .json_loader import FastJSONLoader
 from ..processing_utils.utils import FileType
 
 class DocumentLoaderFactory:
@@ -25,18 +28,30 @@ class DocumentLoaderFactory:
         FileType.XLSX: UnstructuredExcelLoader,
         FileType.PPTX: UnstructuredPowerPointLoader,
         FileType.HTML: BSHTMLLoader,
-        FileType.JSON: JSONLoader,
+        FileType.JSON: FastJSONLoader,
         FileType.MD: UnstructuredMarkdownLoader
     }
+    # Same registry keyed by the raw lowercase extension, so the lookup is a single dict access
+    _extension_parsers = {file_type.value: (file_type, loader_cls) for file_type, loader_cls in _document_parsers.items()}
+    
+    @classmethod
+    def register_loader(cls, file_type: FileType, loader_cls) -> None:
+        
+        cls._document_parsers[file_type] = loader_cls
+        cls._extension_parsers[file_type.value] = (file_type, loader_cls)
     
     @classmethod
-    def get_loader(cls, file_path: Union[str, Path]):
+    def get_loader(cls, file_path: Union[str, Path]) -> Tuple[BaseLoader, FileType]:
+        """Return the loader for the file along with its file type, so callers do not resolve it again."""
         
-        file_type = FileType.from_path(file_path)
+        extension = os.path.splitext(file_path)[1][1:].lower()
         
-        loader_cls = cls._document_parsers[file_type]
+        parser = cls._extension_parsers.get(extension)
+        if parser is None:
+            raise ValueError(f"Unsupported file type: {extension}")
         
-        return loader_cls(file_path)
+        file_type, loader_cls = parser
+        return loader_cls(file_path), file_type
     
 
 
@@ -0,0 +1,42 @@
+from pathlib import Path
+from typing import Iterator, Union
+
+import orjson
+from langchain_core.document_loaders.base import BaseLoader
+from langchain_core.documents import Document as LangchainDocument
+
+
+class FastJSONLoader(BaseLoader):
+    """
+    Load a JSON file with orjson.
+
+    A top-level array gives one document per item, any other value gives a single document.
+    String items are used as is, other values are serialized back to compact JSON.
+
+    Parameters
+    ----------
+    file_path : Union[str, Path]
+        The path to the JSON file.
+    """
+
+    def __init__(self, file_path: Union[str, Path]):
+        self.file_path = file_path
+
+    def lazy_load(self) -> Iterator[LangchainDocument]:
+        """
+        Lazily load the documents of the JSON file.
+
+        Yields
+        ------
+        LangchainDocument
+            The documents, with the source file and the item position in their metadata.
+        """
+        data = orjson.loads(Path(self.file_path).read_bytes())
+        items = data if isinstance(data, list) else [data]
+        source = str(self.file_path)
+
+        for seq_num, item in enumerate(items, start=1):
+            yield LangchainDocument(
+                page_content=item if isinstance(item, str) else orjson.dumps(item).decode(),
+                metadata={"source": source, "seq_num": seq_num}
+            )
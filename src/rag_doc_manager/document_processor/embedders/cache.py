@@ -0,0 +1,229 @@
+import array
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from .base import Embedder
+
+
+class EmbeddingsCache(ABC):
+    """
+    Abstract base class for embedding caches.
+
+    Vectors are stored per (model, text) pair, so repeated inputs skip the
+    round-trip to the embedding provider.
+    """
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """
+        Build the cache key for a text embedded with the given model.
+
+        Parameters
+        ----------
+        model : str
+            Identifier of the embedding model (deployment or model name).
+        text : str
+            The embedded text.
+
+        Returns
+        -------
+        str
+            The cache key.
+        """
+        return f"emb:{model}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    @abstractmethod
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look up the embeddings for multiple texts.
+
+        Parameters
+        ----------
+        model : str
+            Identifier of the embedding model.
+        texts : List[str]
+            The texts to look up.
+
+        Returns
+        -------
+        List[Optional[List[float]]]
+            The cached embedding for each text, or None on a miss.
+        """
+        pass
+
+    @abstractmethod
+    def set_many(self, model: str, texts: List[str], embeddings: List[List[float]]) -> None:
+        """
+        Store the embeddings for multiple texts.
+
+        Parameters
+        ----------
+        model : str
+            Identifier of the embedding model.
+        texts : List[str]
+            The embedded texts.
+        embeddings : List[List[float]]
+            The embedding for each text.
+        """
+        pass
+
+
+class InMemoryEmbeddingsCache(EmbeddingsCache):
+    """
+    Process-local LRU embedding cache.
+
+    Vectors are stored packed as float32 arrays, about an eighth of the memory of lists of Python floats.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        The maximum number of embeddings to keep, by default 10000.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, array.array] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        keys = [self.make_key(model, text) for text in texts]
+        with self._lock:
+            packed = []
+            for key in keys:
+                embedding = self._entries.get(key)
+                if embedding is not None:
+                    self._entries.move_to_end(key)
+                packed.append(embedding)
+        # unpacked outside the lock
+        return [embedding.tolist() if embedding is not None else None for embedding in packed]
+
+    def set_many(self, model: str, texts: List[str], embeddings: List[List[float]]) -> None:
+        packed = [(self.make_key(model, text), array.array('f', embedding)) for text, embedding in zip(texts, embeddings)]
+        with self._lock:
+            for key, embedding in packed:
+                self._entries[key] = embedding
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class RedisEmbeddingsCache(EmbeddingsCache):
+    """
+    Redis-backed embedding cache, shared between processes.
+
+    Vectors are stored as raw float32 bytes.
+
+    Parameters
+    ----------
+    url : str
+        The Redis connection URL.
+    ttl : int, optional
+        Expiry of the cached embeddings in seconds, by default None (no expiry).
+    """
+
+    def __init__(self, url: str, ttl: Optional[int] = None):
+        try:
+            import redis
+            self.client = redis.Redis.from_url(url)
+            self.ttl = ttl
+        except ImportError:
+            raise ImportError("Please install the redis package: pip install redis")
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        values = self.client.mget([self.make_key(model, text) for text in texts])
+        return [array.array('f', value).tolist() if value is not None else None for value in values]
+
+    def set_many(self, model: str, texts: List[str], embeddings: List[List[float]]) -> None:
+        with self.client.pipeline(transaction=False) as pipeline:
+            for text, embedding in zip(texts, embeddings):
+                pipeline.set(self.make_key(model, text), array.array('f', embedding).tobytes(), ex=self.ttl)
+            pipeline.execute()
+
+
+# Shared by every CachedEmbedder that is not given its own cache, entries are keyed by model
+_DEFAULT_CACHE = InMemoryEmbeddingsCache()
+
+
+class CachedEmbedder(Embedder):
+    """
+    Embedder wrapper that serves repeated texts from an embeddings cache.
+
+    Only the texts missing from the cache are sent to the wrapped embedder.
+
+    Parameters
+    ----------
+    embedder : Embedder
+        The embedder used for cache misses.
+    cache : EmbeddingsCache, optional
+        The cache to use, by default a process-wide in-memory cache.
+    model_identifier : str, optional
+        Identifier used in the cache keys, by default the deployment or model name of the embedder.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        cache: Optional[EmbeddingsCache] = None,
+        model_identifier: Optional[str] = None
+    ):
+        self.embedder = embedder
+        self.cache = cache or _DEFAULT_CACHE
+        self.model_identifier = (
+            model_identifier
+            or getattr(embedder, 'deployment_name', None)
+            or getattr(embedder, 'model_name', None)
+            or type(embedder).__name__
+        )
+
+    def embed_text(self, text: str) -> List[float]:
+        """
+        Generate embedding for a single text, using the cache when possible.
+
+        Parameters
+        ----------
+        text : str
+            The input text to embed.
+
+        Returns
+        -------
+        List[float]
+            The embedding vector as a list of floats.
+        """
+        return self.embed_texts([text])[0]
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for multiple texts, only embedding the cache misses.
+
+        Texts repeated within the input are embedded once.
+
+        Parameters
+        ----------
+        texts : List[str]
+            A list of input texts to embed.
+
+        Returns
+        -------
+        List[List[float]]
+            A list of embedding vectors, in the order of the input texts.
+        """
+        embeddings = self.cache.get_many(self.model_identifier, texts)
+
+        # positions of each missing text, so repeated chunks (headers, disclaimers, ...) are embedded once
+        missing: Dict[str, List[int]] = {}
+        for idx, embedding in enumerate(embeddings):
+            if embedding is None:
+                missing.setdefault(texts[idx], []).append(idx)
+
+        if missing:
+            missing_texts = list(missing)
+            new_embeddings = self.embedder.embed_texts(missing_texts)
+            self.cache.set_many(self.model_identifier, missing_texts, new_embeddings)
+            for text, embedding in zip(missing_texts, new_embeddings):
+                for idx in missing[text]:
+                    embeddings[idx] = embedding
+
+        return embeddings
@@ -1,5 +1,5 @@
 from typing import Dict, Type, List
-from .base import Embedder, AzureOpenAIEmbedder, HuggingFaceEmbedder, OpenAIEmbedder
+from .base import Embedder, AzureOpenAIEmbedder, HuggingFaceEmbedder, OnnxEmbedder, OpenAIEmbedder
 
 class EmbedderFactory:
     """
@@ -12,7 +12,8 @@ class EmbedderFactory:
     _embedders: Dict[str, Type[Embedder]] = {
         "azure": AzureOpenAIEmbedder,
         "openai": OpenAIEmbedder,
-        "huggingface": HuggingFaceEmbedder
+        "huggingface": HuggingFaceEmbedder,
+        "onnx": OnnxEmbedder
     }
 
     @classmethod
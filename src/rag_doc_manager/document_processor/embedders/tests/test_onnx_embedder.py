@@ -0,0 +1,62 @@
+import math
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from rag_doc_manager.document_processor.embedders.base import OnnxEmbedder
+
+
+class FakeTokenizer:
+    """Pads the texts of a batch to the longest one, a token per word."""
+
+    def __call__(self, texts, padding, truncation, return_tensors):
+        lengths = [len(text.split()) for text in texts]
+        width = max(lengths)
+        mask = np.array([[1] * length + [0] * (width - length) for length in lengths], dtype=np.int64)
+        return {"input_ids": mask.copy(), "attention_mask": mask}
+
+
+class FakeModel:
+    """Gives every real token the embedding [1, 2] and every padding token [100, 100]."""
+
+    def __call__(self, input_ids, attention_mask):
+        token_embeddings = np.where(attention_mask[..., np.newaxis] == 1, [1.0, 2.0], [100.0, 100.0])
+        return SimpleNamespace(last_hidden_state=token_embeddings.astype(np.float32))
+
+
+def make_embedder(normalize):
+    # no model download, the pooling only needs a tokenizer and a model output
+    embedder = object.__new__(OnnxEmbedder)
+    embedder.tokenizer = FakeTokenizer()
+    embedder.model = FakeModel()
+    embedder.batch_size = 2
+    embedder.normalize = normalize
+    return embedder
+
+
+def test_mean_pooling_ignores_the_padding():
+    embeddings = make_embedder(normalize=False).embed_texts(["one", "one two three"])
+
+    assert embeddings == [[1.0, 2.0], [1.0, 2.0]]
+
+
+def test_embeddings_are_normalized():
+    embeddings = make_embedder(normalize=True).embed_texts(["one", "one two", "one two three"])
+
+    assert len(embeddings) == 3
+    for embedding in embeddings:
+        assert embedding == pytest.approx([1 / math.sqrt(5), 2 / math.sqrt(5)], rel=1e-6)
+
+
+def test_onnx_model_embeddings():
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("optimum.onnxruntime")
+
+    embedder = OnnxEmbedder(quantize=True)
+    first, second = embedder.embed_texts(["a short text", "a short text"])
+
+    assert len(first) == 384
+    assert math.sqrt(sum(value * value for value in first)) == pytest.approx(1.0, rel=1e-4)
+    assert first == pytest.approx(second)
@@ -1,3 +1,4 @@
+import os
 from enum import Enum
 from pathlib import Path
 from typing import Union
@@ -17,12 +18,11 @@ class FileType(str, Enum):
     @classmethod
     def from_path(cls, path: Union[str, Path]) -> 'FileType':
         
-        if isinstance(path, str):
-            path = Path(path)
-        extension = path.suffix.strip('.').lower()
+        extension = os.path.splitext(path)[1][1:].lower()
         
-        try:
-            return cls(extension)
-        except ValueError:
+        # value -> member map of the enum, a plain lookup instead of raising and re-raising ValueError
+        file_type = cls._value2member_map_.get(extension)
+        if file_type is None:
             raise ValueError(f"Unsupported file type: {extension}")
+        return file_type
         
\ No newline at end of file
@@ -1,12 +1,14 @@
+import asyncio
 import os
 import uuid
-from typing import Union, List, Optional, Dict, Any, Annotated
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union, List, Optional, Dict, Any, Annotated, Iterator, Tuple
 from pathlib import Path
 from .document_loaders.factory import DocumentLoaderFactory
 from .chunkers.factory import ChunkerFactory
 from .embedders.base import Embedder
 from .embedders.factory import EmbedderFactory
-from rag_doc_manager.index.data_models.models import Document
+from rag_doc_manager.index.data_models.models import Document, make_chunk_id
 from .processing_utils.utils import FileType
 from langchain.schema import Document as LangchainDocument
 
@@ -28,6 +30,11 @@ class DocumentProcessor:
         The size of chunks to create, by default 1000.
     chunk_overlap : int, optional
         The overlap between chunks, by default 100.
+    n_load_workers : int, optional
+        The number of threads loading files in `process_documents`, by default min(8, CPU count).
+    embed_batch_size : int, optional
+        If set, the chunks are handed to the embedder in batches of this size, bounding the
+        texts in flight for very large inputs, by default None (the embedder batches on its own).
     chunking_kwargs : dict, optional
         Additional arguments to pass to the chunker.
     """
@@ -38,12 +45,16 @@ class DocumentProcessor:
         chunking_strategy: str = "base",
         chunk_size: int = 50,
         chunk_overlap: int = 10,
+        n_load_workers: Optional[int] = None,
+        embed_batch_size: Optional[int] = None,
         **chunking_kwargs
     ):
         self.embedder = embedder
         self.chunking_strategy = chunking_strategy
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.n_load_workers = n_load_workers or min(8, os.cpu_count() or 1)
+        self.embed_batch_size = embed_batch_size
         self.chunking_kwargs = chunking_kwargs
     
     def _generate_document_id(self, file_path: Union[str, Path]) -> str:
@@ -79,9 +90,9 @@ class DocumentProcessor:
         str
             A unique chunk ID.
         """
-        return f"{document_id}_chunk_{chunk_index}"
+        return make_chunk_id(document_id, chunk_index)
     
-    def _load_document(self, file_path: Union[str, Path]) -> List[LangchainDocument]:
+    def _load_document(self, file_path: Union[str, Path]) -> Tuple[List[LangchainDocument], FileType]:
         """
         Load a document using the appropriate loader from DocumentLoaderFactory.
         
@@ -92,11 +103,11 @@ class DocumentProcessor:
             
         Returns
         -------
-        List[LangchainDocument]
-            The loaded document(s) in Langchain format.
+        Tuple[List[LangchainDocument], FileType]
+            The loaded document(s) in Langchain format, and the type of the file.
         """
-        loader = DocumentLoaderFactory.get_loader(file_path)
-        return loader.load()
+        loader, file_type = DocumentLoaderFactory.get_loader(file_path)
+        return loader.load(), file_type
     
     def _chunk_document(
         self, 
@@ -142,7 +153,13 @@ class DocumentProcessor:
         List[List[float]]
             The embeddings for each chunk.
         """
-        return self.embedder.embed_texts(chunks)
+        if not self.embed_batch_size or len(chunks) <= self.embed_batch_size:
+            return self.embedder.embed_texts(chunks)
+
+        embeddings = []
+        for start in range(0, len(chunks), self.embed_batch_size):
+            embeddings.extend(self.embedder.embed_texts(chunks[start:start + self.embed_batch_size]))
+        return embeddings
     
     def _convert_to_documents(
         self,
@@ -152,7 +169,8 @@ class DocumentProcessor:
         user_id: Optional[str],
         is_global: bool,
         session_id: Optional[str],
-        embeddings: List[List[float]]
+        embeddings: List[List[float]],
+        start_position: int = 0
     ) -> List[Document]:
         """
         Convert Langchain documents to our Document model.
@@ -171,35 +189,172 @@ class DocumentProcessor:
             Whether the document is globally accessible.
         embeddings : List[List[float]]
             The embeddings for each document chunk.
+        start_position : int, optional
+            The position of the first chunk within the document, by default 0.
             
         Returns
         -------
         List[Document]
             A list of Document objects ready for indexing.
         """
-        documents = []
-        
-        for idx, (doc, embedding) in enumerate(zip(langchain_docs, embeddings)):
-            chunk_id = self._generate_chunk_id(document_id, idx)
-            
-            # Create a Document object for each chunk
-            document = Document(
+        # Create a Document object for each chunk, Document is a plain dataclass so nothing is re-validated
+        return [
+            Document(
                 account_id=account_id,
                 user_id=user_id,
                 document_id=document_id,
-                chunk_id=chunk_id,
+                chunk_id=make_chunk_id(document_id, idx),
                 chunk_position=idx,
                 content=doc.page_content,
                 is_global=is_global,
                 session_id = session_id,
                 metadata=doc.metadata,
                 embedding=embedding,
-
             )
+            for idx, (doc, embedding) in enumerate(zip(langchain_docs, embeddings), start=start_position)
+        ]
+    
+    def _load_and_chunk_document(
+        self,
+        file_path: Union[str, Path],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> List[LangchainDocument]:
+        """
+        Load a document, add its file metadata and split it into chunks.
+        
+        Parameters
+        ----------
+        file_path : Union[str, Path]
+            The path to the document file.
+        metadata : Optional[Dict[str, Any]], optional
+            Additional metadata to include with the document, by default None.
             
-            documents.append(document)
+        Returns
+        -------
+        List[LangchainDocument]
+            The chunked documents in Langchain format.
+        """
+        # Load document, along with its file type for chunking
+        langchain_docs, file_type = self._load_document(file_path)
         
-        return documents
+        # Add file metadata if provided
+        if metadata:
+            for doc in langchain_docs:
+                doc.metadata.update(metadata)
+                
+        # Add file path and other basic metadata, stat the file once rather than once per loaded page
+        file_metadata = self._file_metadata(file_path, file_type)
+        for doc in langchain_docs:
+            doc.metadata.update(file_metadata)
+        
+        # Chunk document
+        return self._chunk_document(langchain_docs, file_type)
+    
+    def _file_metadata(self, file_path: Union[str, Path], file_type: FileType) -> Dict[str, Any]:
+        """
+        Build the file metadata added to every loaded page of a document.
+        
+        Parameters
+        ----------
+        file_path : Union[str, Path]
+            The path to the document file.
+        file_type : FileType
+            The type of the file.
+            
+        Returns
+        -------
+        Dict[str, Any]
+            The file metadata.
+        """
+        path_obj = Path(file_path)
+        try:
+            file_size = path_obj.stat().st_size
+        except FileNotFoundError:
+            file_size = None
+        return {
+            # "source": str(path_obj),
+            # "filename": path_obj.name,
+            "file_type": str(file_type.value),
+            "file_size": file_size,
+        }
+    
+    def iter_documents(
+        self,
+        file_path: Union[str, Path],
+        account_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        is_global: bool = False,
+        document_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        batch_size: int = 256
+    ) -> Iterator[Document]:
+        """
+        Process a document lazily, yielding Document objects one embedding batch at a time.
+        
+        Pages are loaded and chunked as they are read from the file, so only one batch of
+        chunks and embeddings is held in memory at once. Meant for very large files, the
+        Document objects are the same as the ones returned by `process_document`.
+        
+        Parameters
+        ----------
+        file_path : Union[str, Path]
+            The path to the document file.
+        account_id : Optional[str], optional
+            The account ID for the document, by default None.
+        user_id : Optional[str], optional
+            The user ID for the document, by default None.
+        is_global : bool, optional
+            Whether the document is globally accessible, by default False.
+        document_id : Optional[str], optional
+            The ID to use for the document, by default None (will be generated).
+        session_id : Optional[str], optional
+            The ID of the chat session, by default None.
+        metadata : Optional[Dict[str, Any]], optional
+            Additional metadata to include with the document, by default None.
+        batch_size : int, optional
+            The number of chunks embedded at once, by default 256.
+            
+        Yields
+        ------
+        Document
+            The processed Document objects, in chunk order.
+        """
+        doc_id = document_id or self._generate_document_id(file_path)
+        loader, file_type = DocumentLoaderFactory.get_loader(file_path)
+        file_metadata = self._file_metadata(file_path, file_type)
+        text_splitter = ChunkerFactory.get_splitter(
+            chunking_strategy=self.chunking_strategy,
+            file_type=file_type,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            **self.chunking_kwargs
+        )
+        
+        position = 0
+        batch: List[LangchainDocument] = []
+        
+        def flush() -> List[Document]:
+            embeddings = self._embed_chunks([doc.page_content for doc in batch])
+            return self._convert_to_documents(
+                batch, doc_id, account_id, user_id, is_global, session_id, embeddings, start_position=position
+            )
+        
+        for page in loader.lazy_load():
+            if metadata:
+                page.metadata.update(metadata)
+            page.metadata.update(file_metadata)
+            
+            # splitting page by page gives the same chunks as split_documents on the whole list
+            batch.extend(text_splitter.split_documents([page]))
+            while len(batch) >= batch_size:
+                pending, batch = batch[batch_size:], batch[:batch_size]
+                yield from flush()
+                position += len(batch)
+                batch = pending
+        
+        if batch:
+            yield from flush()
     
     def process_document(
         self,
@@ -239,29 +394,8 @@ class DocumentProcessor:
         # Generate or use provided document ID
         doc_id = document_id or self._generate_document_id(file_path)
         
-        # Load document
-        langchain_docs = self._load_document(file_path)
-        
-        # Extract file type for chunking
-        file_type = FileType.from_path(file_path)
-        
-        # Add file metadata if provided
-        if metadata:
-            for doc in langchain_docs:
-                doc.metadata.update(metadata)
-                
-        # Add file path and other basic metadata
-        path_obj = Path(file_path)
-        for doc in langchain_docs:
-            doc.metadata.update({
-                # "source": str(path_obj),
-                # "filename": path_obj.name,
-                "file_type": str(file_type.value),
-                "file_size": os.path.getsize(file_path) if os.path.exists(file_path) else None,
-            })
-        
-        # Chunk document
-        chunked_docs = self._chunk_document(langchain_docs, file_type)
+        # Load and chunk document
+        chunked_docs = self._load_and_chunk_document(file_path, metadata)
         
         # Extract text content for embedding
         chunk_texts = [doc.page_content for doc in chunked_docs]
@@ -314,17 +448,114 @@ class DocumentProcessor:
         List[Document]
             A list of all processed Document objects ready for indexing.
         """
+        # Load and chunk every file first so that all the chunks are embedded in a single call,
+        # the embedder splits it into provider-sized batches. Loading is mostly file I/O and
+        # parsing in native code, so the files are loaded from a thread pool.
+        with ThreadPoolExecutor(max_workers=max(1, min(self.n_load_workers, len(file_paths)))) as executor:
+            chunked_docs_per_file = list(executor.map(
+                lambda file_path: self._load_and_chunk_document(file_path, metadata), file_paths
+            ))
+        chunk_texts = [doc.page_content for chunked_docs in chunked_docs_per_file for doc in chunked_docs]
+        embeddings = self._embed_chunks(chunk_texts)
+
+        return self._convert_files_to_documents(
+            file_paths, chunked_docs_per_file, embeddings, account_id, user_id, is_global, session_id
+        )
+
+    async def process_documents_async(
+        self,
+        file_paths: List[Union[str, Path]],
+        account_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        is_global: bool = False,
+        session_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
+        """
+        Process multiple documents in batch without blocking the event loop.
+
+        The loaders and embedders are synchronous, so each file is loaded in a worker thread
+        and the files are gathered concurrently, then all the chunks are embedded in one call.
+
+        Parameters
+        ----------
+        file_paths : List[Union[str, Path]]
+            A list of paths to document files.
+        account_id : Optional[str], optional
+            The account ID for the documents, by default None.
+        user_id : Optional[str], optional
+            The user ID for the documents, by default None.
+        is_global : bool, optional
+            Whether the documents are globally accessible, by default False.
+        session_id : Optional[str], optional
+            The ID of the chat session, by default None.
+        metadata : Optional[Dict[str, Any]], optional
+            Additional metadata to include with all documents, by default None.
+
+        Returns
+        -------
+        List[Document]
+            A list of all processed Document objects ready for indexing.
+        """
+        chunked_docs_per_file = await asyncio.gather(*[
+            asyncio.to_thread(self._load_and_chunk_document, file_path, metadata) for file_path in file_paths
+        ])
+        chunk_texts = [doc.page_content for chunked_docs in chunked_docs_per_file for doc in chunked_docs]
+        embeddings = await asyncio.to_thread(self._embed_chunks, chunk_texts)
+
+        return self._convert_files_to_documents(
+            file_paths, chunked_docs_per_file, embeddings, account_id, user_id, is_global, session_id
+        )
+
+    def _convert_files_to_documents(
+        self,
+        file_paths: List[Union[str, Path]],
+        chunked_docs_per_file: List[List[LangchainDocument]],
+        embeddings: List[List[float]],
+        account_id: Optional[str],
+        user_id: Optional[str],
+        is_global: bool,
+        session_id: Optional[str]
+    ) -> List[Document]:
+        """
+        Convert the chunks of several files to Document objects, slicing the combined embeddings per file.
+
+        Parameters
+        ----------
+        file_paths : List[Union[str, Path]]
+            The paths of the processed files.
+        chunked_docs_per_file : List[List[LangchainDocument]]
+            The chunks of each file, in the order of `file_paths`.
+        embeddings : List[List[float]]
+            The embeddings of all the chunks, in the same order.
+        account_id : Optional[str]
+            The account ID for the documents.
+        user_id : Optional[str]
+            The user ID for the documents.
+        is_global : bool
+            Whether the documents are globally accessible.
+        session_id : Optional[str]
+            The ID of the chat session.
+
+        Returns
+        -------
+        List[Document]
+            A list of all the Document objects.
+        """
         all_documents = []
-        
-        for file_path in file_paths:
-            documents = self.process_document(
-                file_path=file_path,
-                account_id=account_id,
-                user_id=user_id,
-                is_global=is_global,
-                session_id=session_id,
-                metadata=metadata
+        offset = 0
+
+        for file_path, chunked_docs in zip(file_paths, chunked_docs_per_file):
+            documents = self._convert_to_documents(
+                chunked_docs,
+                self._generate_document_id(file_path),
+                account_id,
+                user_id,
+                is_global,
+                session_id,
+                embeddings[offset:offset + len(chunked_docs)]
             )
+            offset += len(chunked_docs)
             all_documents.extend(documents)
 
         return all_documents
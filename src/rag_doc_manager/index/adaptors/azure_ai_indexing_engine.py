@@ -1,13 +1,28 @@
-from typing import List, Optional
+import dataclasses
+import datetime
+import functools
+import itertools
+import operator
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from azure.search.documents.indexes import SearchIndexClient
 from azure.search.documents import SearchClient
 
 from azure.search.documents.indexes.models import VectorSearch
 from azure.search.documents.indexes.models import VectorSearchProfile
-from azure.search.documents.indexes.models import HnswAlgorithmConfiguration
+from azure.search.documents.indexes.models import HnswAlgorithmConfiguration, HnswParameters
+from azure.search.documents.indexes.models import ScalarQuantizationCompression, ScalarQuantizationParameters
 from azure.search.documents.indexes.models import SearchIndex
 from azure.search.documents.indexes.models import SearchFieldDataType, SearchField
-from azure.core.exceptions import ResourceNotFoundError
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+from azure.core.pipeline.transport import RequestsTransport
+import requests
+from requests.adapters import HTTPAdapter
 
 from rag_doc_manager.storage.secrets.credentials_handler import AzureCredentialManager
 from rag_doc_manager.index.data_models.models import Document, IndexingResponse, IndexMetadata
@@ -20,37 +35,197 @@ import logging
 # Create a logger object
 logger = logging.getLogger(__name__)  # Use __name__ to get the name of the current module
 
+# Map Pydantic field types to Azure Search types
+_FIELD_TYPE_MAPPING = {
+    "string": SearchFieldDataType.String,
+    "date": SearchFieldDataType.DateTimeOffset,
+    "integer": SearchFieldDataType.Int32,
+    "float": SearchFieldDataType.Double,
+    "boolean": SearchFieldDataType.Boolean
+}
+_VECTOR_FIELD_TYPE = SearchFieldDataType.Collection(SearchFieldDataType.Single)
+_VECTOR_SEARCH_PROFILE_NAME = "my-vector-search-profile"
+_SCALAR_QUANTIZATION_NAME = "my-scalar-quantization"
+
+
+
+@functools.cache
+def _vector_search(m: int, ef_construction: int, ef_search: int, scalar_quantization: bool) -> VectorSearch:
+    """Build the vector search configuration for the given HNSW parameters, once per distinct parameters."""
+    compressions = [
+        ScalarQuantizationCompression(
+            compression_name=_SCALAR_QUANTIZATION_NAME,
+            parameters=ScalarQuantizationParameters(quantized_data_type="int8"),
+        )
+    ] if scalar_quantization else None
+
+    return VectorSearch(
+        algorithms=[
+            HnswAlgorithmConfiguration(
+                name="my-algorithms-config",
+                kind="hnsw",
+                parameters=HnswParameters(
+                    m=m,
+                    ef_construction=ef_construction,
+                    ef_search=ef_search,
+                    metric="cosine",
+                ),
+            )
+        ],
+        profiles=[
+            VectorSearchProfile(
+                name=_VECTOR_SEARCH_PROFILE_NAME,
+                algorithm_configuration_name="my-algorithms-config",
+                compression_name=_SCALAR_QUANTIZATION_NAME if scalar_quantization else None,
+            )
+        ],
+        compressions=compressions,
+    )
+
 class AISearchIndexClient(Index):
     """Implementation of the Index abstract class for Azure AI Search"""
 
-    def __init__(self, ais_service_name: str, index_name: str, ):
+    # Azure AI Search accepts at most 1000 actions per indexing request
+    _BATCH_SIZE = 1000
+    _MAX_CONCURRENT_BATCHES = 8
+    # Per-document statuses worth retrying (throttling, unavailable, concurrent update of the same key)
+    _RETRYABLE_STATUS_CODES = frozenset({409, 422, 429, 503})
+    _MAX_RETRIES = 5
+    _RETRY_BACKOFF_SECONDS = 0.5
+    # Results per page when listing the chunks of a document, the service maximum
+    _LIST_PAGE_SIZE = 1000
+    _EXISTS_CACHE_TTL = 300  # seconds
+    _EXISTS_CACHE_MAXSIZE = 1024
+
+    # SDK clients shared by all the instances, so each service/index keeps one connection pool:
+    # the index client is service-wide, the search client is bound to one index
+    _index_clients: Dict[str, SearchIndexClient] = {}
+    _search_clients: Dict[Tuple[str, str], SearchClient] = {}
+    _clients_lock = threading.Lock()
+    # HTTP session shared by all the SDK clients, so every index of the service reuses the same TCP/TLS connections
+    _session: Optional[requests.Session] = None
+    # Connections kept per host, enough for the concurrent upload batches of several indexing requests
+    _CONNECTION_POOL_SIZE = 100
+    # (service, index) -> (exists, expiry), saves a get_index call per "ensure the index exists" check
+    _index_exists: Dict[Tuple[str, str], Tuple[bool, float]] = {}
+
+    def __init__(self, ais_service_name: str, index_name: str, index_metadata: Optional[IndexMetadata] = None):
         self.service_name = ais_service_name
         self.index_name = index_name
-        self.metadata = None
+        # when given, the schema is taken from the metadata instead of a get_index call
+        self.metadata = index_metadata
+        # index schema, loaded once by _load_schema
+        self._field_names: Optional[tuple] = None
+        self.primary_key: Optional[str] = None
+        self._record_getter: Optional[Callable[[Document], tuple]] = None
         credential_manager = AzureCredentialManager()
         self.credentials = credential_manager.get_credentials()
-        self.index_client = SearchIndexClient(
-            endpoint=f"https://{self.service_name}.search.windows.net",
-            index_name=self.index_name,
-            credential=self.credentials
-        )
-        self.search_client = SearchClient(
-            endpoint=f"https://{self.service_name}.search.windows.net",
-            index_name=self.index_name,
-            credential=self.credentials
-        )
+        self.index_client, self.search_client = self._get_clients(self.service_name, self.index_name, self.credentials)
+
+    @classmethod
+    def _get_clients(cls, service_name: str, index_name: str, credentials) -> Tuple[SearchIndexClient, SearchClient]:
+        """Return the shared SDK clients for the index, building them on first use."""
+        endpoint = f"https://{service_name}.search.windows.net"
+        with cls._clients_lock:
+            index_client = cls._index_clients.get(service_name)
+            if index_client is None:
+                index_client = SearchIndexClient(endpoint=endpoint, credential=credentials, transport=cls._shared_transport())
+                cls._index_clients[service_name] = index_client
+
+            search_client = cls._search_clients.get((service_name, index_name))
+            if search_client is None:
+                search_client = SearchClient(
+                    endpoint=endpoint, index_name=index_name, credential=credentials, transport=cls._shared_transport()
+                )
+                cls._search_clients[(service_name, index_name)] = search_client
+        return index_client, search_client
+
+    @classmethod
+    def _shared_transport(cls) -> RequestsTransport:
+        """Return a transport over the shared HTTP session, the caller holds the clients lock."""
+        if cls._session is None:
+            cls._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=cls._CONNECTION_POOL_SIZE, pool_maxsize=cls._CONNECTION_POOL_SIZE)
+            cls._session.mount("https://", adapter)
+        # the session outlives the clients, it is closed by close_all
+        return RequestsTransport(session=cls._session, session_owner=False)
+
+    def close(self):
+        """Release the instance, a no-op: its SDK clients are shared by all the instances of the index and only closed by close_all."""
+        pass
+
+    @classmethod
+    def close_all(cls):
+        """Close all the shared SDK clients, e.g. on shutdown."""
+        with cls._clients_lock:
+            clients = [*cls._search_clients.values(), *cls._index_clients.values()]
+            cls._search_clients.clear()
+            cls._index_clients.clear()
+            session, cls._session = cls._session, None
+        for client in clients:
+            client.close()
+        if session is not None:
+            session.close()
 
 
+    def _send_batch(self, send: Callable[[List[dict]], list], batch: List[dict]) -> list:
+        """Send one batch of actions, retrying the documents rejected with a transient status with exponential backoff.
+
+        A request that is too large is already split in halves by the SDK, and throttled requests are
+        retried by its retry policy; this covers the per-document failures of an accepted batch.
+        """
+        pending = batch
+        results = []
+        for attempt in range(self._MAX_RETRIES + 1):
+            retry_keys = set()
+            for result in send(pending):
+                if not result.succeeded and result.status_code in self._RETRYABLE_STATUS_CODES and attempt < self._MAX_RETRIES:
+                    retry_keys.add(result.key)
+                else:
+                    results.append(result)
+            if not retry_keys:
+                break
+
+            logger.warning(f"Retrying {len(retry_keys)} documents rejected by index {self.index_name} (attempt {attempt + 1})")
+            pending = [action for action in pending if action[self.primary_key] in retry_keys]
+            time.sleep(self._RETRY_BACKOFF_SECONDS * 2 ** attempt + random.uniform(0, self._RETRY_BACKOFF_SECONDS))
+        return results
+
+    def _send_batches(self, send: Callable[[List[dict]], list], actions: Iterable[dict]) -> list:
+        """Split the actions into batches of at most _BATCH_SIZE and send them concurrently.
+
+        The actions are consumed lazily, at most _MAX_CONCURRENT_BATCHES batches are in memory at once.
+        """
+        results = []
+        in_flight = deque()
+        with ThreadPoolExecutor(max_workers=self._MAX_CONCURRENT_BATCHES) as executor:
+            for batch in itertools.batched(actions, self._BATCH_SIZE):
+                if len(in_flight) >= self._MAX_CONCURRENT_BATCHES:
+                    results.extend(in_flight.popleft().result())
+                in_flight.append(executor.submit(self._send_batch, send, list(batch)))
+            while in_flight:
+                results.extend(in_flight.popleft().result())
+        return results
+
     def index_documents(self, documents: List[Document]) -> List[IndexingResponse]:
         """Index the given list of documents in Azure AI Search."""
         results = []
         self._get_primary_key()
 
-        # Mapping Document model to Azure Search Indexing format
-        docs = [self.convert_doc_to_search_record(doc) for doc in documents]
-        documents_to_index = [doc for doc in docs if doc is not None]
+        # One timestamp for the whole call instead of one clock read per document and field
+        now = datetime.datetime.now(tz=datetime.UTC)
+        for document in documents:
+            document.created_at = document.created_at or now
+            document.updated_at = now
+
+        # Mapping Document model to Azure Search Indexing format, converted batch by batch as they are sent
+        documents_to_index = (
+            record for record in map(self.convert_doc_to_search_record, documents) if record is not None
+        )
 
-        indexing_results = self.search_client.upload_documents(documents=documents_to_index)
+        indexing_results = self._send_batches(
+            lambda batch: self.search_client.upload_documents(documents=batch), documents_to_index
+        )
         
         # Prepare indexing response
         for result in indexing_results:
@@ -70,9 +245,11 @@ class AISearchIndexClient(Index):
 
         chunk_ids = self.list_document_chunks(document_id)
         try:
-            #TODO: Check schema
-            delete_actions = [{"@search.action": "delete", "chunk_id": document_id} for document_id in chunk_ids]
-            indexing_results = self.search_client.upload_documents(documents=delete_actions)
+            # deletions only need the key, sent in concurrent batches like the uploads
+            delete_actions = ({self.primary_key: chunk_id} for chunk_id in chunk_ids)
+            indexing_results = self._send_batches(
+                lambda batch: self.search_client.delete_documents(documents=batch), delete_actions
+            )
 
             for result in indexing_results:
                 results.append(IndexingResponse(
@@ -82,8 +259,9 @@ class AISearchIndexClient(Index):
                 ))
             
             #TODO: Add logging for individual chunk deletion failures
-        except Exception as e:
-            raise Exception(f"Failed to delete chunks for document {document_id}: {e}")
+        except HttpResponseError:
+            logger.exception(f"Failed to delete chunks for document {document_id}")
+            raise
         return results
 
     def list_document_chunks(self, document_id: str) -> List[str]:
@@ -103,11 +281,27 @@ class AISearchIndexClient(Index):
         #TODO: Check if this is the right field in the schema
         filter = f"document_id eq '{document_id}'"
         try:
-            results = self.search_client.search(filter=filter)
-            chunk_ids = [result.get(primary_key) for result in results]
-        except Exception as e:
-            raise Exception(f"Failed to list document chunks for document {document_id}: {e}")
+            # only the keys are fetched, page by page (a search without top returns only its first 50 results);
+            # pages are ordered on the key and start after the last key seen, skip gives no stable order between pages
             chunk_ids = []
+            page_filter = filter
+            while True:
+                results = self.search_client.search(
+                    search_text="*",
+                    filter=page_filter,
+                    select=[primary_key],
+                    order_by=[f"{primary_key} asc"],
+                    top=self._LIST_PAGE_SIZE
+                )
+                page = [result[primary_key] for result in results]
+                chunk_ids.extend(page)
+                if len(page) < self._LIST_PAGE_SIZE:
+                    break
+                last_key = page[-1].replace("'", "''")
+                page_filter = f"{filter} and {primary_key} gt '{last_key}'"
+        except HttpResponseError:
+            logger.exception(f"Failed to list document chunks for document {document_id}")
+            raise
         return chunk_ids
 
 
@@ -115,38 +309,28 @@ class AISearchIndexClient(Index):
         """Create a new index in Azure AI Search."""
         if index.name == self.index_name:
             self.metadata = index
+            # the schema now comes from the metadata
+            self._field_names = None
         else:
             logger.error(f"Index name mismatch: {index.name} != {self.index_name}, the index could not be created.")
             return False
-        azure_fields = self.define_azure_fields(index.config.index_schema)
+        index_schema = index.config.index_schema
+        azure_fields = self.define_azure_fields(index_schema)
         # Formatting the schema for it to be ready for index creation
         try:
-            #TODO: Make this configurable by the user
-            vector_search = VectorSearch(
-            algorithms=[
-                HnswAlgorithmConfiguration(
-                    name="my-algorithms-config",
-                    kind="hnsw",
-                    parameters={
-                        "metric": "cosine",
-                    },
-                )
-            ],
-            profiles=[
-                VectorSearchProfile(
-                    name="my-vector-search-profile",
-                    algorithm_configuration_name="my-algorithms-config",
-                )
-            ],
-            )
-
             index = SearchIndex(
                 name=index.name,
                 fields=azure_fields,
-                vector_search=vector_search,
+                vector_search=_vector_search(
+                    index_schema.hnsw_m,
+                    index_schema.hnsw_ef_construction,
+                    index_schema.hnsw_ef_search,
+                    index_schema.scalar_quantization,
+                ),
             )
             result = self.index_client.create_or_update_index(index)
             logger.info(f"{result.name} created")
+            self._remember_index_exists(result.name, True)
             return True
         except Exception as e:
             logger.error(f"Failed to create index {index.name}: {e}")
@@ -154,96 +338,117 @@ class AISearchIndexClient(Index):
         
 
 
-    async def delete_index(self, index_name: str) -> bool:
+    def delete_index(self, index_name: str) -> bool:
         """Delete the specified index from Azure AI Search."""
         try:
             self.index_client.delete_index(index_name)
+            self._remember_index_exists(index_name, False)
             return True
         except Exception as e:
             logger.error(f"Failed to delete index {index_name}: {e}")
             return False
 
     def check_index_exists(self, index_name: str) -> bool:
-        """Check if the specified index exists in Azure AI Search."""
+        """Check if the specified index exists in Azure AI Search, the answer is cached for a few minutes."""
+        cached = AISearchIndexClient._index_exists.get((self.service_name, index_name))
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
         try:
-            index = self.index_client.get_index(index_name)
-            return True
+            self.index_client.get_index(index_name)
+            exists = True
         except ResourceNotFoundError as e:
             logger.info(f"Index {index_name} not found: {e}")
-            return False
+            exists = False
+        self._remember_index_exists(index_name, exists)
+        return exists
+
+    def _remember_index_exists(self, index_name: str, exists: bool) -> None:
+        if len(AISearchIndexClient._index_exists) >= AISearchIndexClient._EXISTS_CACHE_MAXSIZE:
+            AISearchIndexClient._index_exists.clear()
+        AISearchIndexClient._index_exists[(self.service_name, index_name)] = (
+            exists, time.monotonic() + AISearchIndexClient._EXISTS_CACHE_TTL
+        )
 
         
     def convert_doc_to_search_record(self, document: Document) -> dict:
         """Convert a Document object to a dictionary for indexing in Azure Search."""
-
-        if self.metadata:
-            fields =  [field.name for field in self.metadata.config.index_schema.fields]
-        else:
-            try:
-                fields = [field.name for field in self.index_client.get_index(name = self.index_name).fields]
-            except Exception as e:
-                raise Exception(f"Failed to get fields from index {self.index_name}: {e}")
-                fields = []
+        self._load_schema()
         
-        record = {}
-        for field in fields:
-            record[field] = getattr(document, field, None)
-        self._get_primary_key()
-        if self.primary_key not in record:
+        # index fields that are not attributes of the Document are left empty
+        record = dict.fromkeys(self._field_names)
+        record.update(zip(self._document_field_names, self._record_getter(document)))
+        if record.get(self.primary_key) is None:
             logger.error(f"Primary key {self.primary_key} not found in document {document.document_id}")
-            record = None
+            return None
         return record
         
 
-    def define_azure_fields(self,index_schema: IndexSchema) -> dict:
-        # Map Pydantic field types to Azure Search types
-        field_type_mapping = {
-            "string": SearchFieldDataType.String,  
-            "date": SearchFieldDataType.DateTimeOffset,  
-            "integer": SearchFieldDataType.Int32,  
-            "float": SearchFieldDataType.Double,  
-            "boolean": SearchFieldDataType.Boolean 
-            }
-
-        # Build fields for Azure Search
-        azure_fields = []
-        for field in index_schema.fields:
-            print(field)
-            azure_field = SearchField(name=field.name, type=field_type_mapping[field.field_type])
-            
-            # Set other attributes if specified
-            if field.filterable:
-                azure_field.filterable = True
-            if field.searchable:
-                azure_field.searchable = True
-            if field.sortable:
-                azure_field.sortable = True
-            if field.primary_key:
-                azure_field.key = True
-            
-            azure_fields.append(azure_field)
+    def define_azure_fields(self,index_schema: IndexSchema) -> list:
+        # Build fields for Azure Search, attributes that are not set are left to the service defaults
+        azure_fields = [
+            SearchField(
+                name=field.name,
+                type=_FIELD_TYPE_MAPPING[field.field_type],
+                filterable=field.filterable or None,
+                searchable=field.searchable or None,
+                sortable=field.sortable or None,
+                key=field.primary_key or None,
+            )
+            for field in index_schema.fields
+        ]
         
         # Include vector dimensions if applicable (for vector search)
         if index_schema.vector_dimensions:
             # Assuming vector search is supported by your field types (e.g., "Collection(Edm.Single)")
             # TODO: Check based on asumed general schema
-            vector_field = SearchField(name="embedding", type=SearchFieldDataType.Collection(SearchFieldDataType.Single), vector_search_dimensions=1536,
-                vector_search_profile_name="my-vector-search-profile",)
-            vector_field.vector_search_dimensions = index_schema.vector_dimensions
-            azure_fields.append(vector_field)
+            azure_fields.append(SearchField(
+                name="embedding",
+                type=_VECTOR_FIELD_TYPE,
+                vector_search_dimensions=index_schema.vector_dimensions,
+                vector_search_profile_name=_VECTOR_SEARCH_PROFILE_NAME,
+            ))
         
         return azure_fields
 
-    def _get_primary_key(self) -> Optional[str]:
-        """Get the primary key field for the index."""
-        try:
-            fields = self.index_client.get_index(name=self.index_name).fields
+    def _load_schema(self, refresh: bool = False) -> None:
+        """Load the field names and the primary key of the index, only once unless refresh is set.
+
+        The schema comes from the index metadata when known, otherwise from a single get_index call.
+        """
+        if self._field_names is not None and not refresh:
+            return
+
+        if self.metadata:
+            index_schema = self.metadata.config.index_schema
+            field_names = tuple(field.name for field in index_schema.fields)
+            # the vector field is not part of the schema fields, define_azure_fields adds it
+            if index_schema.vector_dimensions:
+                field_names += ("embedding",)
+            primary_key = next((field.name for field in index_schema.fields if field.primary_key), None)
+        else:
+            try:
+                fields = self.index_client.get_index(name=self.index_name).fields
+            except HttpResponseError:
+                logger.exception(f"Failed to get fields from index {self.index_name}")
+                raise
+            field_names = tuple(field.name for field in fields)
             primary_key = next((field.name for field in fields if field.key), None)
-            self.primary_key = primary_key
-            return primary_key
-        except Exception as e:
-            raise Exception(f"Failed to get primary key for index {self.index_name}: {e}")
-            return None
+
+        self._field_names = field_names
+        self.primary_key = primary_key
+
+        # fetch all the Document attributes of a record in a single attrgetter call
+        document_attributes = {field.name for field in dataclasses.fields(Document)}
+        self._document_field_names = tuple(name for name in field_names if name in document_attributes)
+        getter = operator.attrgetter(*self._document_field_names) if self._document_field_names else (lambda document: ())
+        # attrgetter returns a bare value rather than a tuple for a single attribute
+        self._record_getter = getter if len(self._document_field_names) != 1 else (lambda document: (getter(document),))
+
+    def _get_primary_key(self, refresh: bool = False) -> Optional[str]:
+        """Get the primary key field for the index."""
+        self._load_schema(refresh=refresh)
+        return self.primary_key
 
 
 class AISearchException(Exception):
@@ -50,6 +50,7 @@ class Index(ABC):
     
     This class defines the interface for index providers.
     Invoked at every user call. Instantiated when index needs to be created, as well.
+    The methods are synchronous and block on the provider SDK, async callers run them in a worker thread.
     
     Attributes
     ----------
@@ -59,7 +60,7 @@ class Index(ABC):
     
     # the documents here are already processed and ready to be indexed
     @abstractmethod
-    async def index_documents(self, documents: List[Document]) -> List[IndexingResponse]:
+    def index_documents(self, documents: List[Document]) -> List[IndexingResponse]:
         """Index the given list of documents.
         
         Parameters
@@ -75,7 +76,7 @@ class Index(ABC):
         pass
 
     @abstractmethod
-    async def delete_document(self, document_id: str) -> List[bool]:
+    def delete_document(self, document_id: str) -> List[bool]:
         """Delete all the chunks for the document from the index, given the document id 
         
         Parameters
@@ -128,7 +129,7 @@ class Index(ABC):
     
     
     @abstractmethod
-    async def create_index(self, index: IndexMetadata, **kwargs) -> bool:
+    def create_index(self, index: IndexMetadata, **kwargs) -> bool:
         
         
         """Create a new index with the specified metadata.
@@ -147,7 +148,7 @@ class Index(ABC):
     
 
     @abstractmethod
-    async def delete_index(self, index_name: str, **kwargs) -> bool:
+    def delete_index(self, index_name: str, **kwargs) -> bool:
         """Delete an index with the specified name.
         
         Parameters
@@ -164,7 +165,7 @@ class Index(ABC):
     
     
     @abstractmethod
-    async def check_index_exists(self, index_name: str, **kwargs) -> bool:
+    def check_index_exists(self, index_name: str, **kwargs) -> bool:
         """Check if the index with the specified name exists.
         
         Parameters
@@ -21,7 +21,12 @@ class IndexingResponse:
     document_id: str
     error_message: Optional[str]
 
-@dataclass
+def make_chunk_id(document_id: str, chunk_position: int) -> str:
+    """Build the id of a chunk from its document id and position, the one place the chunk id format is defined."""
+    return f"{document_id}_chunk_{chunk_position}"
+
+
+@dataclass(slots=True)
 class Document:
     """
     Document enriched by the system to be indexed with extended metadata and hierarchical relationships.
@@ -51,12 +56,18 @@ class Document:
     embedding: Optional[List[float]] = None
     
     
-    # Timestamps for auditing
-    created_at: datetime = field(default_factory=lambda: datetime.datetime.now(tz=datetime.UTC))
-    updated_at: datetime = field(default_factory=lambda: datetime.datetime.now(tz=datetime.UTC))
+    # Timestamps for auditing, set once per batch by the indexing engine when not provided
+    created_at: Optional[datetime.datetime] = None
+    updated_at: Optional[datetime.datetime] = None
 
     version: int = 1
     # additional_fields: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        # Chunk ids are derived from the document and the position, so re-indexing a chunk
+        # (e.g. retrying a failed batch) overwrites it instead of adding a duplicate
+        if self.chunk_id is None and self.chunk_position is not None:
+            self.chunk_id = make_chunk_id(self.document_id, self.chunk_position)
     
     # def __post_init__(self):
     #     # Add additional fields as attributes
@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import pytest
+
+from rag_doc_manager.index.adaptors.azure_ai_indexing_engine import AISearchIndexClient
+
+
+@dataclass
+class FakeIndexingResult:
+    key: str
+    succeeded: bool
+    status_code: int
+    error_message: Optional[str] = None
+
+
+class FakeSearchClient:
+    """Answers each upload with the next scripted status of every document, 201 once the script is over."""
+
+    def __init__(self, statuses):
+        self.statuses = {key: list(codes) for key, codes in statuses.items()}
+        self.uploads = []
+
+    def upload_documents(self, documents):
+        self.uploads.append([document["chunk_id"] for document in documents])
+        results = []
+        for document in documents:
+            codes = self.statuses.get(document["chunk_id"])
+            status_code = codes.pop(0) if codes else 201
+            results.append(FakeIndexingResult(
+                key=document["chunk_id"],
+                succeeded=status_code < 300,
+                status_code=status_code,
+                error_message=None if status_code < 300 else f"status {status_code}",
+            ))
+        return results
+
+
+@pytest.fixture
+def index_client(monkeypatch):
+    # no credentials nor SDK clients, _send_batch only needs the index name and its primary key
+    client = object.__new__(AISearchIndexClient)
+    client.index_name = "test-index"
+    client.primary_key = "chunk_id"
+    monkeypatch.setattr(AISearchIndexClient, "_RETRY_BACKOFF_SECONDS", 0)
+    return client
+
+
+def _send(index_client, search_client, keys):
+    batch = [{"chunk_id": key, "content": key} for key in keys]
+    return index_client._send_batch(lambda documents: search_client.upload_documents(documents=documents), batch)
+
+
+@pytest.mark.parametrize("status_code", [409, 422, 429, 503])
+def test_send_batch_retries_transient_document_failures(index_client, status_code):
+    search_client = FakeSearchClient({"b": [status_code, status_code]})
+
+    results = _send(index_client, search_client, ["a", "b", "c"])
+
+    # only the rejected document is sent again
+    assert search_client.uploads == [["a", "b", "c"], ["b"], ["b"]]
+    assert sorted(result.key for result in results) == ["a", "b", "c"]
+    assert all(result.succeeded for result in results)
+
+
+def test_send_batch_does_not_retry_permanent_failures(index_client):
+    search_client = FakeSearchClient({"b": [400]})
+
+    results = _send(index_client, search_client, ["a", "b"])
+
+    assert search_client.uploads == [["a", "b"]]
+    failed = [result for result in results if not result.succeeded]
+    assert [(result.key, result.status_code) for result in failed] == [("b", 400)]
+
+
+def test_send_batch_gives_up_after_max_retries(index_client):
+    attempts = AISearchIndexClient._MAX_RETRIES + 1
+    search_client = FakeSearchClient({"b": [503] * (attempts + 1)})
+
+    results = _send(index_client, search_client, ["a", "b"])
+
+    assert len(search_client.uploads) == attempts
+    assert len(results) == 2
+    failed = [result for result in results if not result.succeeded]
+    assert [(result.key, result.status_code) for result in failed] == [("b", 503)]
@@ -1,6 +1,13 @@
 from pydantic import BaseModel
 from dataclasses import dataclass, field
 from datetime import datetime
+from enum import Enum
+
+
+class IndexStatus(str, Enum):
+    CREATING = "creating"  # record written, index not created yet
+    READY = "ready"
+    FAILED = "failed"  # index creation failed and was rolled back
 
     
 class IndexRecord(BaseModel):
@@ -10,4 +17,8 @@ class IndexRecord(BaseModel):
     document_ids: list[str]
     created_at: datetime
     updated_at: datetime
-    admin_id: str
\ No newline at end of file
+    admin_id: str
+    status: IndexStatus = IndexStatus.READY
+
+    class Config:
+        use_enum_values = True
\ No newline at end of file
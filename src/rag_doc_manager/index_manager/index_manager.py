@@ -1,9 +1,10 @@
-from typing import List, Union, Tuple
+from typing import ClassVar, Dict, List, Optional, Union, Tuple
 import datetime
 from typing_extensions import Self
 from dataclasses import dataclass
 import uuid
 import logging
+import threading
 # from pydantic import BaseModel, model_validator
 
 from rag_doc_manager.customer_manager.data_models.models import IndexingStrategy
@@ -12,7 +13,7 @@ from rag_doc_manager.index.adaptors.azure_ai_indexing_engine import AISearchInde
 from rag_doc_manager.storage.secrets.azure_key_vault import AzureKeyVaultStore
 from rag_doc_manager.index.data_models.models import IndexMetadata
 from rag_doc_manager.storage.database_manager.cosmosdb_manager import CosmosDBClient
-from rag_doc_manager.index_manager.data_models.models import IndexRecord
+from rag_doc_manager.index_manager.data_models.models import IndexRecord, IndexStatus
 
 from rag_doc_manager.index.base import Index
 
@@ -28,10 +29,29 @@ class ClientIndexMapping:
 
 
 class MonoStateIndexManager:
-    
-    def __init__(self):
-        
-        self.__dict__["_INTERNAL_INDEX_REGISTRY"] = MonoStateIndexManager._INTERNAL_INDEX_REGISTRY
+    """
+    Shares the registry of customer indices between all the index managers of the process.
+
+    The registry is guarded by a fixed set of locks striped on the customer id, so managers
+    of different customers rarely wait on each other.
+    """
+
+    _REGISTRY_LOCK_STRIPES = 16
+    # customer_id -> names of the indices created for the customer
+    _INTERNAL_INDEX_REGISTRY: ClassVar[Dict[str, List[str]]] = {}
+    _REGISTRY_LOCKS: ClassVar[List[threading.Lock]] = [threading.Lock() for _ in range(_REGISTRY_LOCK_STRIPES)]
+
+    @classmethod
+    def _registry_lock(cls, customer_id: str) -> threading.Lock:
+        """Return the registry lock guarding the given customer."""
+        return cls._REGISTRY_LOCKS[hash(customer_id) % cls._REGISTRY_LOCK_STRIPES]
+
+    @classmethod
+    def _register_index(cls, customer_id: str, index_name: str) -> None:
+        """Record an index of the customer in the shared registry, the caller holds the customer's lock."""
+        index_names = cls._INTERNAL_INDEX_REGISTRY.setdefault(customer_id, [])
+        if index_name not in index_names:
+            index_names.append(index_name)
     
 class IndexCreationError(Exception):
     """Raised when an error occurs during index creation."""
@@ -56,6 +76,8 @@ class IndexManager(MonoStateIndexManager):
     key_vault_url = 'https://kv-indcopilot-llmops-dev.vault.azure.net/'
     _INDEX_COLLECTION_NAME = 'indexes'
     _COSMOSDB_DATABASE = 'rag_doc_manager'
+    # A record still CREATING after that long belongs to a creation that was interrupted (e.g. the process died)
+    _CREATING_TIMEOUT = datetime.timedelta(minutes=10)
     
     def __init__(self, customer_id: str, account_id: str):
         
@@ -69,9 +91,10 @@ class IndexManager(MonoStateIndexManager):
             }
         )
 
-        self.search_service = self.key_vault.get_secret('aisearch-endpoint')
+        secrets = self.key_vault.get_secrets(['aisearch-endpoint', 'cosmosdb-connection-string'])
+        self.search_service = secrets['aisearch-endpoint']
 
-        self.index_collection = CosmosDBClient(connection_string=self.key_vault.get_secret("cosmosdb-connection-string"), database_name=IndexManager._COSMOSDB_DATABASE, collection_name=IndexManager._INDEX_COLLECTION_NAME, primary_key = "index_name")
+        self.index_collection = CosmosDBClient(connection_string=secrets["cosmosdb-connection-string"], database_name=IndexManager._COSMOSDB_DATABASE, collection_name=IndexManager._INDEX_COLLECTION_NAME, primary_key = "index_name")
 
     def _get_index_config(self) -> Self:
         
@@ -98,31 +121,108 @@ class IndexManager(MonoStateIndexManager):
         
     
     def _need_to_create_new_index(self, index_maintainer: Index) -> bool:
-        
-        if index_maintainer.check_index_exists(self.index_name):
+
+        index_exists = index_maintainer.check_index_exists(self.index_name)
+        index_record = self.index_collection.get_record(record_id=self.index_name)
+        if index_record and index_record.get("status") == IndexStatus.CREATING.value and index_exists:
+            # the index was created but its status was never recorded (the process died or the update failed),
+            # it may already hold documents: the record is repaired, the index is kept
+            logger.warning(f"Index {self.index_name} exists but its record is still {IndexStatus.CREATING.value}, marking it {IndexStatus.READY.value}")
+            self._set_index_status(IndexStatus.READY)
+            return False
+
+        if index_exists:
             return False
         
         return True
 
+    @classmethod
+    def _is_stale_creation(cls, index_record: dict) -> bool:
+        """Check if the record is still CREATING after the creation timeout."""
+        if index_record.get("status") != IndexStatus.CREATING.value:
+            return False
+        updated_at = index_record.get("updated_at")
+        if updated_at is None:
+            return True
+        # the database returns naive UTC datetimes
+        if updated_at.tzinfo is None:
+            updated_at = updated_at.replace(tzinfo=datetime.UTC)
+        return datetime.datetime.now(datetime.UTC) - updated_at > cls._CREATING_TIMEOUT
+
     def create_new_index(self, user_id: str, client_index_schema_manager: CustomerIndexSchemaManager) -> None:
         
         self.client_index_schema_manager = client_index_schema_manager
         self._get_index_config()
         self._create_unique_index_name()
         
-        index_client = AISearchIndexClient(ais_service_name = self.search_service, index_name = self.index_name)
+        index_metadata = IndexMetadata(name=self.index_name, config=self.client_index_config)
+        index_client = AISearchIndexClient(ais_service_name = self.search_service, index_name = self.index_name, index_metadata = index_metadata)
+        # concurrent requests of the same customer must not both decide to create the index
+        with self._registry_lock(self.customer_id):
+            self._create_index_if_missing(index_client, index_metadata, user_id)
+            self._register_index(self.customer_id, self.index_name)
+
+    def _create_index_if_missing(self, index_client: AISearchIndexClient, index_metadata: IndexMetadata, user_id: str) -> None:
         try:
             if self._need_to_create_new_index(index_client):
-                index_metadata = IndexMetadata(name=self.index_name, config=self.client_index_config)
-                index_client.create_index(index_metadata)
-
+                # Two-phase: the record is written first so a failed creation is never left untracked,
+                # the index is rolled back if it cannot be created and a retry simply starts over
                 try:
-                    index_record = IndexRecord(customer_id=self.customer_id, index_name=self.index_name, account_ids={self.account_id}, document_ids=[], created_at=datetime.datetime.now(datetime.UTC).isoformat(), admin_id=user_id, updated_at=datetime.datetime.now(datetime.UTC).isoformat())
+                    now = datetime.datetime.now(datetime.UTC)
+                    index_record = IndexRecord(customer_id=self.customer_id, index_name=self.index_name, account_ids={self.account_id}, document_ids=[], created_at=now, admin_id=user_id, updated_at=now, status=IndexStatus.CREATING)
                     self.index_collection.insert_record(record_data=index_record.model_dump(), record_id=self.index_name)
                 except Exception as e:
                     raise Exception(f"Failed to create record for index: {self.index_name}: {str(e)}")
+
+                if not index_client.create_index(index_metadata):
+                    self._set_index_status(IndexStatus.FAILED)
+                    # the creation may have partially gone through on the service side
+                    index_client.delete_index(self.index_name)
+                    raise IndexCreationError(f"Azure AI Search could not create index {self.index_name}")
+
+                self._set_index_status(IndexStatus.READY)
         except Exception as e:
             raise Exception(f"Failed to create index {self.index_name}: {str(e)}")  
+
+    def _set_index_status(self, status: IndexStatus, index_name: Optional[str] = None) -> bool:
+        """Set the creation status of the index record, by default the one of the managed index."""
+        return self.index_collection.patch_record(
+            record_id=index_name or self.index_name,
+            update={"$set": {"status": status.value, "updated_at": datetime.datetime.now(datetime.UTC)}}
+        )
+
+    def delete_failed_indexes(self) -> List[str]:
+        """ Deletes the indexes whose creation failed, along with their records.
+        Meant to be run periodically to clean up after creations that could not be rolled back.
+
+        Records still CREATING after the creation timeout belong to an interrupted creation: when
+        their index exists it was created (and may hold documents), the record is marked READY;
+        otherwise only the record is deleted.
+
+        Returns:
+        -------
+            List[str]: The names of the deleted indexes.
+        """
+        deleted = []
+        unfinished_query = {"status": {"$in": [IndexStatus.FAILED.value, IndexStatus.CREATING.value]}}
+        for record in self.index_collection.query_records(unfinished_query):
+            index_name = record["index_name"]
+            if record["status"] == IndexStatus.CREATING.value and not self._is_stale_creation(record):
+                # a creation still in progress
+                continue
+
+            index_client = AISearchIndexClient(ais_service_name=self.search_service, index_name=index_name)
+            index_exists = index_client.check_index_exists(index_name)
+            if record["status"] == IndexStatus.CREATING.value and index_exists:
+                logger.warning(f"Index {index_name} exists but its record is still {IndexStatus.CREATING.value}, marking it {IndexStatus.READY.value}")
+                self._set_index_status(IndexStatus.READY, index_name=index_name)
+                continue
+
+            if not index_exists or index_client.delete_index(index_name):
+                deleted.append(index_name)
+        # the records of the deleted indexes are dropped in one round-trip
+        self.index_collection.bulk_delete(deleted)
+        return deleted
         
     def delete_index(self):
         raise NotImplementedError
@@ -136,7 +236,7 @@ class IndexManager(MonoStateIndexManager):
         If document was deleted, document is removed from the index record.
 
         Args:
-            document_id (str): The document id.
+            document_id (Union[str, List[str]]): The document id, or several document ids.
             action (str): The action to be performed. Either 'add' or 'delete'.
         
         Returns:
@@ -146,21 +246,19 @@ class IndexManager(MonoStateIndexManager):
         #TODO: Update to customer id search
         self.index_name = self.customer_id
 
-        # Get the index record
-        index_record = self.index_collection.get_record(record_id=self.index_name)
-        
-        if index_record:
-            if action == 'add':
-                index_record["document_ids"].append(document_id)
-            elif action == 'delete':
-                index_record["document_ids"].remove(document_id)
-            else:
-                logger.error(f"Invalid action: {action}")
-                return False
-            self.index_collection.update_or_create_record(
-                updated_data=index_record,
-                record_id=self.index_name
-            )
+        document_ids = [document_id] if isinstance(document_id, str) else list(document_id)
+
+        # Update the document ids in place, a single atomic update instead of reading and rewriting the record
+        if action == 'add':
+            # $addToSet so a re-uploaded document is not listed twice
+            update = {"$addToSet": {"document_ids": {"$each": document_ids}}}
+        elif action == 'delete':
+            update = {"$pull": {"document_ids": {"$in": document_ids}}}
+        else:
+            logger.error(f"Invalid action: {action}")
+            return False
+
+        if self.index_collection.patch_record(record_id=self.index_name, update=update):
             return True
         else:
             logger.warning(f"Index record not found for index name {self.index_name}. Could not update record.")
@@ -0,0 +1,181 @@
+import datetime
+
+import pytest
+
+from rag_doc_manager.index_manager import index_manager as index_manager_module
+from rag_doc_manager.index_manager.data_models.models import IndexStatus
+from rag_doc_manager.index_manager.index_manager import IndexManager
+
+
+class FakeCosmosDBClient:
+    """In-memory stand-in for CosmosDBClient, records keyed on their primary key."""
+
+    def __init__(self, fail_patches=0):
+        self.records = {}
+        # number of upcoming patch_record calls that raise, as a lost connection would
+        self.fail_patches = fail_patches
+
+    def insert_record(self, record_data, record_id):
+        self.records[record_id] = dict(record_data)
+
+    def get_record(self, record_id):
+        return self.records.get(record_id)
+
+    def patch_record(self, record_id, update):
+        if self.fail_patches:
+            self.fail_patches -= 1
+            raise ConnectionError("lost connection to Cosmos DB")
+        record = self.records.get(record_id)
+        if record is None:
+            return False
+        record.update(update["$set"])
+        return True
+
+    def query_records(self, query):
+        statuses = query["status"]["$in"]
+        return [dict(record) for record in self.records.values() if record["status"] in statuses]
+
+    def bulk_delete(self, record_ids):
+        return sum(self.records.pop(record_id, None) is not None for record_id in record_ids)
+
+
+class FakeIndexClient:
+    """Stand-in for AISearchIndexClient, the indexes of the fake service are shared by all its clients."""
+
+    indexes = set()
+
+    def __init__(self, ais_service_name=None, index_name=None, index_metadata=None, create_succeeds=True):
+        self.create_succeeds = create_succeeds
+        self.created = []
+        self.deleted = []
+
+    def check_index_exists(self, index_name):
+        return index_name in FakeIndexClient.indexes
+
+    def create_index(self, index_metadata):
+        self.created.append(index_metadata.name)
+        if self.create_succeeds:
+            FakeIndexClient.indexes.add(index_metadata.name)
+        return self.create_succeeds
+
+    def delete_index(self, index_name):
+        self.deleted.append(index_name)
+        FakeIndexClient.indexes.discard(index_name)
+        return True
+
+
+class FakeIndexMetadata:
+
+    def __init__(self, name):
+        self.name = name
+
+
+@pytest.fixture(autouse=True)
+def fake_service(monkeypatch):
+    FakeIndexClient.indexes = set()
+    monkeypatch.setattr(index_manager_module, "AISearchIndexClient", FakeIndexClient)
+
+
+def make_manager(collection, index_name="customer"):
+    # no Key Vault nor database connection, the manager only talks to the fakes
+    manager = object.__new__(IndexManager)
+    manager.customer_id = "customer"
+    manager.account_id = "account"
+    manager.search_service = "service"
+    manager.index_name = index_name
+    manager.index_collection = collection
+    return manager
+
+
+def creating_record(index_name, minutes_ago):
+    updated_at = datetime.datetime.now(datetime.UTC) - datetime.timedelta(minutes=minutes_ago)
+    # the database returns naive UTC datetimes
+    return {"index_name": index_name, "status": IndexStatus.CREATING.value, "updated_at": updated_at.replace(tzinfo=None)}
+
+
+def test_creation_marks_the_record_ready():
+    collection = FakeCosmosDBClient()
+    index_client = FakeIndexClient()
+
+    make_manager(collection)._create_index_if_missing(index_client, FakeIndexMetadata("customer"), user_id="admin")
+
+    assert index_client.created == ["customer"]
+    assert collection.records["customer"]["status"] == IndexStatus.READY.value
+
+
+def test_failed_creation_is_rolled_back_and_marked_failed():
+    collection = FakeCosmosDBClient()
+    index_client = FakeIndexClient(create_succeeds=False)
+
+    with pytest.raises(Exception, match="could not create index customer"):
+        make_manager(collection)._create_index_if_missing(index_client, FakeIndexMetadata("customer"), user_id="admin")
+
+    assert index_client.deleted == ["customer"]
+    assert collection.records["customer"]["status"] == IndexStatus.FAILED.value
+
+
+def test_retry_after_an_interrupted_creation_repairs_the_record():
+    # the index was created but recording its READY status failed
+    collection = FakeCosmosDBClient(fail_patches=1)
+    index_client = FakeIndexClient()
+    manager = make_manager(collection)
+    with pytest.raises(Exception, match="lost connection"):
+        manager._create_index_if_missing(index_client, FakeIndexMetadata("customer"), user_id="admin")
+    assert collection.records["customer"]["status"] == IndexStatus.CREATING.value
+
+    manager._create_index_if_missing(index_client, FakeIndexMetadata("customer"), user_id="admin")
+
+    # the existing index is kept, not created again nor deleted
+    assert index_client.created == ["customer"]
+    assert index_client.deleted == []
+    assert collection.records["customer"]["status"] == IndexStatus.READY.value
+
+
+def test_retry_creates_the_index_of_a_creating_record_without_index():
+    collection = FakeCosmosDBClient()
+    collection.records["customer"] = creating_record("customer", minutes_ago=30)
+    index_client = FakeIndexClient()
+
+    make_manager(collection)._create_index_if_missing(index_client, FakeIndexMetadata("customer"), user_id="admin")
+
+    assert index_client.created == ["customer"]
+    assert collection.records["customer"]["status"] == IndexStatus.READY.value
+
+
+def test_cleanup_keeps_the_index_of_a_stale_creating_record():
+    collection = FakeCosmosDBClient()
+    collection.records["created"] = creating_record("created", minutes_ago=30)
+    FakeIndexClient.indexes.add("created")
+
+    assert make_manager(collection).delete_failed_indexes() == []
+
+    assert "created" in FakeIndexClient.indexes
+    assert collection.records["created"]["status"] == IndexStatus.READY.value
+
+
+def test_cleanup_deletes_stale_creating_records_without_index():
+    collection = FakeCosmosDBClient()
+    collection.records["interrupted"] = creating_record("interrupted", minutes_ago=30)
+
+    assert make_manager(collection).delete_failed_indexes() == ["interrupted"]
+    assert "interrupted" not in collection.records
+
+
+def test_cleanup_skips_creations_in_progress():
+    collection = FakeCosmosDBClient()
+    collection.records["in-progress"] = creating_record("in-progress", minutes_ago=1)
+
+    assert make_manager(collection).delete_failed_indexes() == []
+    assert collection.records["in-progress"]["status"] == IndexStatus.CREATING.value
+
+
+def test_cleanup_deletes_failed_indexes_and_records():
+    collection = FakeCosmosDBClient()
+    collection.records["failed"] = {"index_name": "failed", "status": IndexStatus.FAILED.value}
+    collection.records["ready"] = {"index_name": "ready", "status": IndexStatus.READY.value}
+    FakeIndexClient.indexes.update({"failed", "ready"})
+
+    assert make_manager(collection).delete_failed_indexes() == ["failed"]
+
+    assert FakeIndexClient.indexes == {"ready"}
+    assert set(collection.records) == {"ready"}
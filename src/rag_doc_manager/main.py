@@ -1,9 +1,56 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from rag_doc_manager.api.routes.registration import router as registration_router
 from rag_doc_manager.api.routes.documents import router as documents_router
 from rag_doc_manager.api.routes.search import router as search_router
+from rag_doc_manager.index.adaptors.azure_ai_indexing_engine import AISearchIndexClient
+from rag_doc_manager.customer_manager.remote_customer_schema_manager import CustomerIndexSchemaManager
+from rag_doc_manager.document_manager.azure_document_manager import AzureDocumentManager
+from rag_doc_manager.index_manager.index_manager import IndexManager
+from rag_doc_manager.storage.database_manager.cosmosdb_manager import CosmosDBClient
+from rag_doc_manager.storage.secrets.azure_key_vault import AzureKeyVaultStore
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# (database, collection, primary key) of the collections read and written by primary key
+_KEYED_COLLECTIONS = [
+    (AzureDocumentManager._COSMOSDB_DATABASE, AzureDocumentManager._DOCUMENT_COLLECTION_NAME, "document_id"),
+    (IndexManager._COSMOSDB_DATABASE, IndexManager._INDEX_COLLECTION_NAME, "index_name"),
+    (CustomerIndexSchemaManager._COSMOSDB_DATABASE, CustomerIndexSchemaManager._COSMOSDB_STATE_COLLECTION, "customer_id"),
+]
+
+
+def ensure_database_indexes() -> None:
+    """Index the primary key of the collections, so the point reads and writes do not scan them."""
+    key_vault = AzureKeyVaultStore(config={'vault_url': AzureDocumentManager.key_vault_url})
+    connection_string = key_vault.get_secret("cosmosdb-connection-string")
+    for database_name, collection_name, primary_key in _KEYED_COLLECTIONS:
+        CosmosDBClient(
+            connection_string=connection_string,
+            database_name=database_name,
+            collection_name=collection_name,
+            primary_key=primary_key
+        ).ensure_primary_key_index()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await asyncio.to_thread(ensure_database_indexes)
+    except Exception as e:
+        # the service still works without the indexes, only slower
+        logger.error(f"Could not index the database collections: {e}")
+    yield
+    # the Azure AI Search clients are shared for the lifetime of the process
+    AISearchIndexClient.close_all()
+
 
-app = FastAPI(root_path="/api/v1")
+app = FastAPI(root_path="/api/v1", default_response_class=ORJSONResponse, lifespan=lifespan)
 
 
 @app.get('/')
@@ -1,9 +1,13 @@
 from .base import QueryEngine, SearchStrategy, SearchParams, SearchResponse, Scope
 from .factory import QueryEngineFactory
+from .batching import QueryBatcher
+from .cache import SemanticQueryCache, get_semantic_cache
 
 __all__ = [
     QueryEngine,
     QueryEngineFactory,
+    QueryBatcher,
+    SemanticQueryCache,
     SearchStrategy,
     SearchParams,
     SearchResponse,
@@ -1,48 +1,160 @@
+import functools
 import logging
-from typing import Optional, Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Dict, Any, List, Tuple, Union
 import time
 from azure.search.documents.models import VectorizedQuery, QueryType
 from azure.search.documents import SearchClient
 from azure.identity import DefaultAzureCredential
 
 from ..base import QueryEngine, SearchParams, SearchResult, SearchResponse, Scope
+from ..cache import SemanticQueryCache
 from rag_doc_manager.document_processor.embedders.factory import EmbedderFactory
+from rag_doc_manager.document_processor.embedders.cache import CachedEmbedder
 from rag_doc_manager.storage.secrets.azure_key_vault import AzureKeyVaultStore
 from rag_doc_manager.storage.secrets.credentials_handler import AzureCredentialManager
 
-class AISearchQueryEngine(QueryEngine):
+# Filter of each scope, the global scope (and unknown scopes) only match global documents
+_SCOPE_FILTER_TEMPLATES = {
+    'account': ('account_id', "account_id eq '{account_id}'"),
+    'user': ('user_id', "user_id eq '{user_id}'"),
+    'session': ('session_id', "session_id eq '{session_id}'"),
+}
+_GLOBAL_SCOPE_FILTER = "is_global eq true"
+
+
+@functools.lru_cache(maxsize=4096)
+def _scope_filter(scope: Optional[str], account_id: Optional[str], user_id: Optional[str], session_id: Optional[str]) -> str:
+    """Build the filter of the scope, once per distinct scope and owner."""
+    if scope not in _SCOPE_FILTER_TEMPLATES:
+        return _GLOBAL_SCOPE_FILTER
+    owner_field, template = _SCOPE_FILTER_TEMPLATES[scope]
+    owners = {'account_id': account_id, 'user_id': user_id, 'session_id': session_id}
+    assert owners[owner_field]
+    return template.format_map(owners)
+
+
+def _format_list_filter(field: str, values: list) -> Optional[str]:
+    # Handle list values for IN-style queries
+    if not values:
+        return None
+    if isinstance(values[0], str):
+        values_str = ", ".join([f"'{v}'" for v in values])
+    else:
+        values_str = ", ".join([str(v) for v in values])
+    return f"{field} in ({values_str})"
 
-    credentials = AzureCredentialManager().get_credentials()
 
-    key_vault = AzureKeyVaultStore(
-            config={
-                'vault_url': 'https://kv-indcopilot-llmops-dev.vault.azure.net/'
-            }
-        )
+# Custom filter formatter per value type, bool is looked up before its int base class
+_FILTER_FORMATTERS: Dict[type, Callable[[str, Any], Optional[str]]] = {
+    str: lambda field, value: f"{field} eq '{value}'",
+    bool: lambda field, value: f"{field} eq {str(value).lower()}",
+    int: lambda field, value: f"{field} eq {value}",
+    float: lambda field, value: f"{field} eq {value}",
+    list: _format_list_filter,
+}
+
 
-    embedder = EmbedderFactory.create_embedder(
-        'azure',
-        # api_key=self.key_vault.get_secret("openai-api-key"),
-        endpoint=key_vault.get_secret("azure-openai-endpoint"),
-        deployment_name='text-embedding-ada-002'
-    )
+def _filter_formatter(value: Any) -> Optional[Callable[[str, Any], Optional[str]]]:
+    """Return the formatter of the value type, falling back on its base classes (e.g. str enums)."""
+    for value_type in type(value).__mro__:
+        formatter = _FILTER_FORMATTERS.get(value_type)
+        if formatter is not None:
+            return formatter
+    return None
+
+
+class AISearchQueryEngine(QueryEngine):
+
+    _KEY_VAULT_URL = 'https://kv-indcopilot-llmops-dev.vault.azure.net/'
+
+    # Shared by all the engines, built on first use so importing the module does not reach Azure
+    _credentials = None
+    _key_vault: Optional[AzureKeyVaultStore] = None
+    _embedder: Optional[CachedEmbedder] = None
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def _get_credentials(cls):
+        with cls._shared_lock:
+            if cls._credentials is None:
+                cls._credentials = AzureCredentialManager().get_credentials()
+            return cls._credentials
+
+    @classmethod
+    def _get_key_vault(cls) -> AzureKeyVaultStore:
+        with cls._shared_lock:
+            if cls._key_vault is None:
+                cls._key_vault = AzureKeyVaultStore(config={'vault_url': cls._KEY_VAULT_URL})
+            return cls._key_vault
+
+    @classmethod
+    def _get_embedder(cls) -> CachedEmbedder:
+        if cls._embedder is None:
+            # the Key Vault lookup happens outside the lock, so a slow fetch does not block the other accessors
+            endpoint = cls._get_key_vault().get_secret("azure-openai-endpoint")
+            with cls._shared_lock:
+                if cls._embedder is None:
+                    # repeated queries are served from the embeddings cache
+                    cls._embedder = CachedEmbedder(EmbedderFactory.create_embedder(
+                        'azure',
+                        # api_key=self.key_vault.get_secret("openai-api-key"),
+                        endpoint=endpoint,
+                        deployment_name='text-embedding-ada-002'
+                    ))
+        return cls._embedder
 
 
     def __init__(
         self,
+        semantic_cache: Optional[SemanticQueryCache] = None
     ):
+        """
+        Parameters
+        ----------
+        semantic_cache : Optional[SemanticQueryCache], optional
+            Cache answering vector searches similar to a recent one without querying the index, by default None.
+        """
 
-        self.service_name = self.key_vault.get_secret('aisearch-endpoint')
+        self.service_name = self._get_key_vault().get_secret('aisearch-endpoint')
+        self.semantic_cache = semantic_cache
         self.logger = logging.getLogger(__name__)
 
 
+    _MAX_CONCURRENT_SEARCHES = 8
+    # Neighbours fetched from the HNSW graph per requested result, the extra candidates make up for
+    # the approximate search and are trimmed back to top_k by the service
+    _VECTOR_OVERSAMPLING = 4
+
+    # Searches in flight at once in the process, beyond that the service throttles with 503s
+    _MAX_INFLIGHT_SEARCHES = 32
+    _inflight_searches = threading.BoundedSemaphore(_MAX_INFLIGHT_SEARCHES)
+
+    # One client per index shared by the searches, so connections and bearer tokens are reused
+    _search_clients: Dict[Tuple[str, str], SearchClient] = {}
+    _search_clients_lock = threading.Lock()
+
     def _get_search_client(self, index_name: str) -> SearchClient:
 
-        return SearchClient(
-            endpoint=f"https://{self.service_name}.search.windows.net",
-            index_name=index_name,
-            credential=AISearchQueryEngine.credentials
-        )
+        key = (self.service_name, index_name)
+        with AISearchQueryEngine._search_clients_lock:
+            search_client = AISearchQueryEngine._search_clients.get(key)
+            if search_client is None:
+                search_client = SearchClient(
+                    endpoint=f"https://{self.service_name}.search.windows.net",
+                    index_name=index_name,
+                    credential=AISearchQueryEngine._get_credentials()
+                )
+                AISearchQueryEngine._search_clients[key] = search_client
+        return search_client
+
+    @staticmethod
+    def _query_embedder(search_params: SearchParams):
+        """Return the embedder for the query, bypassing the embeddings cache when the search opted out of it."""
+        if search_params.use_cache:
+            return AISearchQueryEngine._get_embedder()
+        return AISearchQueryEngine._get_embedder().embedder
 
     def _build_filter_expression(
         self,
@@ -53,55 +165,20 @@ class AISearchQueryEngine(QueryEngine):
         custom_filters: Dict[str, Any] = None
     ) -> Optional[str]:
 
-        filter_conditions = []
-        # Add hierarchical filters
-
-        if scope == 'account':
-            assert account_id
-            filter_conditions.append(f"account_id eq '{account_id}'")
-
-        elif scope == 'user':
-            assert user_id
-            filter_conditions.append(f"user_id eq '{user_id}'")
-
-        elif scope == 'session':
-            assert session_id
-            filter_conditions.append(f"session_id eq '{session_id}'")
-
-        else:
-            # If is_global is True, include global documents in the results, as well
-            if filter_conditions:
-                # If we already have user-specific filters, add OR condition for global docs
-                global_condition = "is_global eq true"
-                existing_conditions = " and ".join(filter_conditions)
-                filter_conditions = [f"({existing_conditions}) or {global_condition}"]
-            else:
-                # If no filters yet, just include global docs
-                filter_conditions.append("is_global eq true")
+        # Add hierarchical filters, the same few scope filters come back on every query
+        scope_filter = _scope_filter(scope, account_id, user_id, session_id)
+        if not custom_filters:
+            return scope_filter
 
+        filter_conditions = [scope_filter]
         # Add custom filters
-        if custom_filters:
-            for field, value in custom_filters.items():
-                if isinstance(value, str):
-                    filter_conditions.append(f"{field} eq '{value}'")
-                elif isinstance(value, bool):
-                    filter_conditions.append(f"{field} eq {str(value).lower()}")
-                elif isinstance(value, (int, float)):
-                    filter_conditions.append(f"{field} eq {value}")
-                elif isinstance(value, list):
-                    # Handle list values for IN-style queries
-                    if value and isinstance(value[0], str):
-                        values_str = ", ".join([f"'{v}'" for v in value])
-                        filter_conditions.append(f"{field} in ({values_str})")
-                    elif value:
-                        values_str = ", ".join([str(v) for v in value])
-                        filter_conditions.append(f"{field} in ({values_str})")
+        for field, value in custom_filters.items():
+            formatter = _filter_formatter(value)
+            if formatter is not None and (condition := formatter(field, value)):
+                filter_conditions.append(condition)
 
         # Combine all conditions with AND
-        if filter_conditions:
-            return " and ".join(filter_conditions)
-
-        return None
+        return " and ".join(filter_conditions)
 
     def search(
         self,
@@ -134,23 +211,28 @@ class AISearchQueryEngine(QueryEngine):
         search_params : Optional[SearchParams], optional
             Parameters for configuring search behavior, by default None.
         **kwargs
-            Additional keyword arguments
+            Additional keyword arguments. `embedded_query` can hold an already computed
+            query embedding, in which case the query is not embedded again.
 
        Returns
         -------
         SearchResponse
             The search results.
         """
-        # Start timing the query
-
         # TODO: leverage the super class to add this functionality
 
-        search_client = self._get_search_client(index_name)
-        start_time = time.time()
-
         if search_params is None:
             search_params = SearchParams()
 
+        # TODO: only dealing with vector search right now, the other strategies return no results
+        # before any client or embedding work
+        if search_params.search_strategy != 'vector':
+            self.logger.warning(f"Search strategy {search_params.search_strategy} not implemented, no results returned")
+            return SearchResponse(results=[], total_results=0, query_time_ms=0.0)
+
+        # Start timing the query
+        start_time = time.perf_counter()
+
         # TODO: deal with global documents
         filter_expression = self._build_filter_expression(
             account_id=account_id,
@@ -166,7 +248,7 @@ class AISearchQueryEngine(QueryEngine):
         search_options = {
             'filter': filter_expression,
             'top': search_params.top_k,
-            'include_total_count': True,
+            'include_total_count': search_params.include_total_count,
             'query_type': 'simple',
             "select": "document_id,chunk_id,content,is_global,account_id,user_id"
         }
@@ -175,65 +257,107 @@ class AISearchQueryEngine(QueryEngine):
         if search_params.sort_by:
             search_options["order_by"] = search_params.sort_by
 
-        if search_params.search_strategy == 'vector':
-
-            # TODO: only dealing with vector search right now
-            embedded_query = AISearchQueryEngine.embedder.embed_text(query)
-
-            vector_query = VectorizedQuery(
-                vector=embedded_query,
-                k_nearest_neighbors=search_params.top_k,
-                fields="embedding",
-                exhaustive=True # exhaustive search for accuracy
-            )
-
-            # setting up vector search options
-            search_options["vector_queries"] = [vector_query]
-            search_options.pop('query_type', None)
-
-            search_results = search_client.search(
-                search_text=None,
-                **search_options
-            )
-
-        elif search_params.search_strategy == 'text':
-
-            # raise NotImplementedError("text search not implemented")
-            search_results = []
-            pass
-        elif search_params.search_strategy == 'hybrid':
-            search_results = []
-            # raise NotImplementedError("hybrid search not implemented")
-            pass
-        else:
-
-            self.logger.warning(
-                f"Search strategy {search_params.search_strategy} not implemented, falling back to vector search")
-
-            # Default to vector search
+        embedded_query = kwargs.get('embedded_query') or self._query_embedder(search_params).embed_text(query)
+
+        # responses are only shared between queries with the same index, filters and result count
+        cache_namespace = SemanticQueryCache.namespace(index_name, filter_expression, search_params.top_k, search_params.sort_by)
+        use_semantic_cache = self.semantic_cache is not None and search_params.use_cache
+        if use_semantic_cache:
+            cached_response = self.semantic_cache.get(cache_namespace, embedded_query)
+            if cached_response is not None:
+                cached_response.query_time_ms = (time.perf_counter() - start_time) * 1000
+                return cached_response
+
+        vector_query = VectorizedQuery(
+            vector=embedded_query,
+            k_nearest_neighbors=(
+                search_params.top_k if search_params.exhaustive
+                else search_params.top_k * AISearchQueryEngine._VECTOR_OVERSAMPLING
+            ),
+            fields="embedding",
+            exhaustive=search_params.exhaustive
+        )
 
-        results = []
-        for result in search_results:
+        # setting up vector search options
+        search_options["vector_queries"] = [vector_query]
+        search_options.pop('query_type', None)
 
-            metadata = {}
-            if hasattr(result, "metadata") and result.metadata:
-                metadata = result.metadata
+        search_results, total_count = self._execute_search(self._get_search_client(index_name), search_options)
 
-            search_result = SearchResult(
+        # the service returns plain dicts with the selected fields, they are trusted and skip validation
+        results = [
+            SearchResult.model_construct(
                 document_id=result['document_id'],
                 content=result['content'],
                 score=result["@search.score"],
-                chunk_id=result.get('chunk_id', None),
-                metadata=metadata
+                chunk_id=result.get('chunk_id'),
+                metadata=result.get('metadata') or {}
             )
+            for result in search_results
+        ]
 
-            results.append(search_result)
-
-        query_time_ms = (time.time() - start_time) * 1000
-        return SearchResponse(
+        query_time_ms = (time.perf_counter() - start_time) * 1000
+        response = SearchResponse.model_construct(
             results=results,
-            total_results=search_results.get_count(),
+            total_results=total_count if total_count is not None else len(results),
             query_time_ms=query_time_ms
         )
+        if use_semantic_cache:
+            self.semantic_cache.set(cache_namespace, embedded_query, response)
+        return response
+
+    def _execute_search(self, search_client: SearchClient, search_options: Dict[str, Any]) -> Tuple[List[dict], Optional[int]]:
+        """
+        Run a vector search and read its results, within the in-flight limit.
 
+        The results are paged lazily by the SDK, so they are read while holding the in-flight slot.
+        Throttled (429/503) requests are retried by the retry policy of the SDK client.
 
+        Returns
+        -------
+        Tuple[List[dict], Optional[int]]
+            The results, and the total count when it was requested.
+        """
+        with AISearchQueryEngine._inflight_searches:
+            search_results = search_client.search(search_text=None, **search_options)
+            results = list(search_results)
+            total_count = search_results.get_count() if search_options.get('include_total_count') else None
+        return results, total_count
+
+    def search_batch(self, requests: List[Dict[str, Any]]) -> List[Union[SearchResponse, Exception]]:
+        """
+        Run several searches, embedding all the vector queries with a single embeddings call
+        and sending the searches concurrently.
+
+        Parameters
+        ----------
+        requests : List[Dict[str, Any]]
+            The keyword arguments of `search` for each query.
+
+        Returns
+        -------
+        List[Union[SearchResponse, Exception]]
+            The response (or the raised exception) for each request, in order.
+        """
+        # queries that opted out of the cache are embedded by each search on its own
+        vector_queries = list(dict.fromkeys(
+            request['query'] for request in requests
+            if (search_params := request.get('search_params') or SearchParams()).search_strategy == 'vector'
+            and search_params.use_cache
+        ))
+        embedded_queries = {}
+        if vector_queries:
+            embedded_queries = dict(zip(vector_queries, AISearchQueryEngine._get_embedder().embed_texts(vector_queries)))
+
+        def run(request: Dict[str, Any]) -> Union[SearchResponse, Exception]:
+            try:
+                use_cache = (request.get('search_params') or SearchParams()).use_cache
+                return self.search(**request, embedded_query=embedded_queries.get(request['query']) if use_cache else None)
+            except Exception as e:
+                return e
+
+        if len(requests) == 1:
+            return [run(requests[0])]
+
+        with ThreadPoolExecutor(max_workers=min(len(requests), self._MAX_CONCURRENT_SEARCHES)) as executor:
+            return list(executor.map(run, requests))
@@ -51,6 +51,12 @@ class SearchParams(BaseModel):
     # sort_order: Optional[str] = None  # "asc" or "desc"
     vector_search_weight: Optional[float] = None
     keyword_search_weight: Optional[float] = None
+    # serve the query embedding from the embeddings cache, disable for queries that must not be cached
+    use_cache: bool = True
+    # brute-force scan of every vector instead of the approximate HNSW search, exact but O(N) per query
+    exhaustive: bool = False
+    # count all the matching documents instead of returning the number of results, costs the service a full pass
+    include_total_count: bool = False
 
     class Config:
         use_enum_values = True
@@ -85,4 +91,27 @@ class QueryEngine(ABC):
         **kwargs
     ) -> SearchResponse:
         
-        pass
\ No newline at end of file
+        pass
+
+    def search_batch(self, requests: List[Dict[str, Any]]) -> List[Union[SearchResponse, Exception]]:
+        """
+        Run several searches at once. Engines that can share work across queries should override this.
+
+        Parameters
+        ----------
+        requests : List[Dict[str, Any]]
+            The keyword arguments of `search` for each query.
+
+        Returns
+        -------
+        List[Union[SearchResponse, Exception]]
+            The response for each request, in order. A failing request returns its exception
+            instead, so it does not fail the rest of the batch.
+        """
+        responses = []
+        for request in requests:
+            try:
+                responses.append(self.search(**request))
+            except Exception as e:
+                responses.append(e)
+        return responses
\ No newline at end of file
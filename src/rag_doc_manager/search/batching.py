@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .base import QueryEngine, SearchResponse
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBatcher:
+    """
+    Coalesces search requests that arrive close together into batches.
+
+    Requests are queued and drained by a background task which collects up to
+    `max_batch_size` requests and hands them to `QueryEngine.search_batch` so the
+    engine can share work across queries (e.g. one embeddings call for the whole batch).
+    While no batch is running the queued requests are sent right away; while one is,
+    the next batch waits at most `max_wait_ms` after its first request for more.
+
+    Parameters
+    ----------
+    query_engine : QueryEngine
+        The query engine running the batched searches.
+    max_batch_size : int, optional
+        The maximum number of requests per batch, by default 16.
+    max_wait_ms : float, optional
+        How long to wait for more requests after the first one of a batch, when a batch is
+        already running, by default 50.
+    """
+
+    def __init__(self, query_engine: QueryEngine, max_batch_size: int = 16, max_wait_ms: float = 50.0):
+        self.query_engine = query_engine
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+    async def search(self, **search_kwargs) -> SearchResponse:
+        """
+        Queue a search and wait for its result.
+
+        Parameters
+        ----------
+        **search_kwargs
+            The keyword arguments of `QueryEngine.search`.
+
+        Returns
+        -------
+        SearchResponse
+            The search results.
+        """
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((search_kwargs, future))
+        return await future
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            # the requests already queued join the batch without waiting
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            # waiting for more only pays off while a batch is running, otherwise a lone request would be delayed
+            if self._in_flight:
+                deadline = loop.time() + self.max_wait_ms / 1000
+                while len(batch) < self.max_batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+            # dispatch without waiting so the next batch can be collected meanwhile
+            task = asyncio.create_task(self._dispatch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        requests = [search_kwargs for search_kwargs, _ in batch]
+        try:
+            # the query engines are synchronous, keep them off the event loop
+            responses = await asyncio.to_thread(self.query_engine.search_batch, requests)
+        except Exception as e:
+            logger.error(f"Search batch of {len(batch)} requests failed: {e}")
+            responses = [e] * len(batch)
+
+        for (_, future), response in zip(batch, responses):
+            if future.done():
+                continue
+            if isinstance(response, Exception):
+                future.set_exception(response)
+            else:
+                future.set_result(response)
@@ -0,0 +1,236 @@
+import array
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+from .base import SearchResponse
+
+logger = logging.getLogger(__name__)
+
+
+def _load_vector_functions(connection: sqlite3.Connection) -> None:
+    """Load the sqlite-vec extension, which provides `vec_distance_cosine`, into the connection."""
+    try:
+        import sqlite_vec
+    except ImportError:
+        raise ImportError("Please install the sqlite-vec package: pip install rag-doc-manager[semantic-cache]")
+
+    if not hasattr(connection, "enable_load_extension"):
+        raise ImportError("The semantic cache needs a Python whose sqlite3 module can load extensions")
+    connection.enable_load_extension(True)
+    sqlite_vec.load(connection)
+    connection.enable_load_extension(False)
+
+
+class SemanticQueryCache:
+    """
+    Persistent cache of search responses, matched on the similarity of the query embeddings.
+
+    A query whose embedding is close enough to a cached one (cosine similarity above
+    `similarity_threshold`) is answered with the cached response, so paraphrases of a
+    recent query skip the search service. Entries are namespaced, so different indexes,
+    scopes or owners never share responses; the namespaces of an index are built with
+    `namespace` and dropped together by `invalidate` when the documents of the index change.
+
+    The entries are stored in SQLite and compared with the `vec_distance_cosine` function
+    of the sqlite-vec extension. A database file is opened once per thread, so lookups run
+    concurrently; an in-memory database lives on a single connection guarded by a lock.
+
+    Parameters
+    ----------
+    path : str, optional
+        The SQLite database file, by default ":memory:" (not persisted).
+    similarity_threshold : float, optional
+        The minimum cosine similarity for a cache hit, by default 0.86.
+    ttl : float, optional
+        Expiry of the cached responses in seconds, by default 3600.
+    maxsize : int, optional
+        The maximum number of cached responses, the oldest are evicted first, by default 10000.
+    """
+
+    # Expired and overflowing entries are pruned once every that many inserts, not on each one
+    _PRUNE_EVERY = 100
+    _NAMESPACE_SEPARATOR = "|"
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        similarity_threshold: float = 0.86,
+        ttl: float = 3600.0,
+        maxsize: int = 10000
+    ):
+        self.path = path
+        self.max_distance = 1.0 - similarity_threshold
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._inserts = 0
+
+        # an in-memory database only exists on the connection that created it, it is shared by the threads
+        self._shared_connection = None
+        connection = self._connect(check_same_thread=path != ":memory:")
+        if path == ":memory:":
+            self._shared_connection = connection
+        else:
+            self._local.connection = connection
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS semantic_cache ("
+                "namespace TEXT NOT NULL, embedding BLOB NOT NULL, response TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS semantic_cache_namespace ON semantic_cache (namespace, expires_at)"
+            )
+
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=check_same_thread)
+        _load_vector_functions(connection)
+        if self.path != ":memory:":
+            # readers of the file are not blocked by the writers
+            connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """The connection of the calling thread, or the shared in-memory one under the lock."""
+        if self._shared_connection is not None:
+            with self._lock:
+                yield self._shared_connection
+            return
+
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        yield connection
+
+    @staticmethod
+    def _serialize(embedding: List[float]) -> bytes:
+        # sqlite-vec reads vectors as packed float32
+        return array.array('f', embedding).tobytes()
+
+    @classmethod
+    def namespace(cls, index_name: str, *parts) -> str:
+        """
+        Build the namespace of the queries of an index.
+
+        Parameters
+        ----------
+        index_name : str
+            The name of the index the queries run against.
+        *parts
+            Whatever else the responses depend on (filters, result count, ordering).
+
+        Returns
+        -------
+        str
+            The namespace, invalidated along with the other namespaces of the index.
+        """
+        return cls._NAMESPACE_SEPARATOR.join([index_name, *(str(part) for part in parts)])
+
+    def get(self, namespace: str, embedding: List[float]) -> Optional[SearchResponse]:
+        """
+        Look up the response of the closest cached query.
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the query.
+        embedding : List[float]
+            The embedding of the query.
+
+        Returns
+        -------
+        Optional[SearchResponse]
+            The cached response, or None if no cached query is similar enough.
+        """
+        with self._connection() as connection:
+            row = connection.execute(
+                "SELECT response, vec_distance_cosine(embedding, ?) AS distance FROM semantic_cache "
+                "WHERE namespace = ? AND expires_at > ? ORDER BY distance LIMIT 1",
+                (self._serialize(embedding), namespace, time.time())
+            ).fetchone()
+
+        if row is None or row[1] > self.max_distance:
+            return None
+        logger.debug(f"Semantic cache hit in {namespace} (cosine distance {row[1]:.3f})")
+        return SearchResponse.model_validate_json(row[0])
+
+    def set(self, namespace: str, embedding: List[float], response: SearchResponse) -> None:
+        """
+        Store the response of a query.
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the query.
+        embedding : List[float]
+            The embedding of the query.
+        response : SearchResponse
+            The search response.
+        """
+        now = time.time()
+        with self._connection() as connection, connection:
+            connection.execute(
+                "INSERT INTO semantic_cache (namespace, embedding, response, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, self._serialize(embedding), response.model_dump_json(), now + self.ttl)
+            )
+            # an approximate count is enough to space out the pruning
+            self._inserts += 1
+            if self._inserts % SemanticQueryCache._PRUNE_EVERY == 0:
+                connection.execute("DELETE FROM semantic_cache WHERE expires_at <= ?", (now,))
+                connection.execute(
+                    "DELETE FROM semantic_cache WHERE rowid NOT IN "
+                    "(SELECT rowid FROM semantic_cache ORDER BY expires_at DESC LIMIT ?)",
+                    (self.maxsize,)
+                )
+
+    def invalidate(self, index_name: str) -> int:
+        """
+        Drop the cached responses of an index, once its documents have changed.
+
+        Parameters
+        ----------
+        index_name : str
+            The name of the index.
+
+        Returns
+        -------
+        int
+            The number of dropped responses.
+        """
+        prefix = index_name + SemanticQueryCache._NAMESPACE_SEPARATOR
+        with self._connection() as connection, connection:
+            cursor = connection.execute(
+                "DELETE FROM semantic_cache WHERE namespace = ? OR substr(namespace, 1, ?) = ?",
+                (index_name, len(prefix), prefix)
+            )
+        return cursor.rowcount
+
+
+# The database file of the semantic cache, the cache is disabled when unset (":memory:" for a per-process cache)
+SEMANTIC_CACHE_PATH_ENV = "RAG_DOC_MANAGER_SEMANTIC_CACHE_PATH"
+
+_semantic_cache: Optional[SemanticQueryCache] = None
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> Optional[SemanticQueryCache]:
+    """
+    Return the process-wide semantic cache, None when it is not enabled.
+
+    The cache is enabled by setting the RAG_DOC_MANAGER_SEMANTIC_CACHE_PATH environment variable
+    and needs the `semantic-cache` extra.
+    """
+    global _semantic_cache
+    path = os.environ.get(SEMANTIC_CACHE_PATH_ENV)
+    if not path:
+        return None
+    with _semantic_cache_lock:
+        if _semantic_cache is None:
+            _semantic_cache = SemanticQueryCache(path=path)
+    return _semantic_cache
@@ -1,5 +1,6 @@
 from enum import Enum
 from .adaptors import AISearchQueryEngine
+from .cache import get_semantic_cache
 
 
 class Providers(Enum):
@@ -21,4 +22,7 @@ class QueryEngineFactory:
         provider_class = cls._PROVIDERS.get(str(provider).lower())
         if not provider_class:
             raise ValueError(f"Provider '{provider}' not supported or not implemented")
-        return provider_class(**kwargs)
\ No newline at end of file
+        if provider_class is AISearchQueryEngine:
+            # the semantic cache is enabled through the RAG_DOC_MANAGER_SEMANTIC_CACHE_PATH setting
+            kwargs.setdefault('semantic_cache', get_semantic_cache())
+        return provider_class(**kwargs)
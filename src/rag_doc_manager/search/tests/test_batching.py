@@ -0,0 +1,110 @@
+import asyncio
+import threading
+
+from rag_doc_manager.search.batching import QueryBatcher
+
+
+class FakeQueryEngine:
+    """Records the batches it is given, the first one is held until `release` is set."""
+
+    def __init__(self, hold_first_batch=False, error=None):
+        self.batches = []
+        self.release = threading.Event()
+        self.error = error
+        if not hold_first_batch:
+            self.release.set()
+
+    def search_batch(self, requests):
+        self.batches.append([request["query"] for request in requests])
+        if len(self.batches) == 1:
+            self.release.wait(timeout=5)
+        if self.error is not None:
+            raise self.error
+        return [f"result of {request['query']}" for request in requests]
+
+
+async def _wait_for_batches(engine, count):
+    while len(engine.batches) < count:
+        await asyncio.sleep(0.001)
+
+
+def test_lone_request_is_not_delayed():
+    async def scenario():
+        engine = FakeQueryEngine()
+        batcher = QueryBatcher(engine, max_batch_size=16, max_wait_ms=10_000)
+        return await asyncio.wait_for(batcher.search(query="q1"), timeout=1)
+
+    assert asyncio.run(scenario()) == "result of q1"
+
+
+def test_batch_is_flushed_when_full():
+    async def scenario():
+        engine = FakeQueryEngine(hold_first_batch=True)
+        # the window is far longer than the test, only a full batch can be flushed
+        batcher = QueryBatcher(engine, max_batch_size=2, max_wait_ms=10_000)
+        first = asyncio.create_task(batcher.search(query="q1"))
+        await _wait_for_batches(engine, 1)
+
+        second = asyncio.create_task(batcher.search(query="q2"))
+        third = asyncio.create_task(batcher.search(query="q3"))
+        await asyncio.wait_for(_wait_for_batches(engine, 2), timeout=1)
+        engine.release.set()
+        results = await asyncio.gather(first, second, third)
+        return engine.batches, results
+
+    batches, results = asyncio.run(scenario())
+    assert batches == [["q1"], ["q2", "q3"]]
+    assert results == ["result of q1", "result of q2", "result of q3"]
+
+
+def test_batch_is_flushed_after_the_window():
+    async def scenario():
+        engine = FakeQueryEngine(hold_first_batch=True)
+        batcher = QueryBatcher(engine, max_batch_size=16, max_wait_ms=50)
+        first = asyncio.create_task(batcher.search(query="q1"))
+        await _wait_for_batches(engine, 1)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        second = asyncio.create_task(batcher.search(query="q2"))
+        # sent while the first batch is still running, once the window is over
+        await asyncio.wait_for(_wait_for_batches(engine, 2), timeout=1)
+        waited = loop.time() - started
+        engine.release.set()
+        await asyncio.gather(first, second)
+        return engine.batches, waited
+
+    batches, waited = asyncio.run(scenario())
+    assert batches == [["q1"], ["q2"]]
+    assert waited >= 0.045
+
+
+def test_batch_error_is_delivered_to_each_caller():
+    async def scenario():
+        engine = FakeQueryEngine(error=RuntimeError("search service unavailable"))
+        batcher = QueryBatcher(engine, max_batch_size=16, max_wait_ms=50)
+        return await asyncio.gather(
+            batcher.search(query="q1"), batcher.search(query="q2"), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert len(results) == 2
+    for result in results:
+        assert isinstance(result, RuntimeError)
+        assert str(result) == "search service unavailable"
+
+
+def test_per_request_errors_are_delivered_to_their_caller():
+    class PartialEngine:
+        def search_batch(self, requests):
+            return [ValueError("bad query") if request["query"] == "bad" else "ok" for request in requests]
+
+    async def scenario():
+        batcher = QueryBatcher(PartialEngine())
+        good = asyncio.create_task(batcher.search(query="good"))
+        bad = asyncio.create_task(batcher.search(query="bad"))
+        return await good, await asyncio.gather(bad, return_exceptions=True)
+
+    good, (bad,) = asyncio.run(scenario())
+    assert good == "ok"
+    assert isinstance(bad, ValueError)
@@ -0,0 +1,109 @@
+import array
+import math
+import sqlite3
+
+import pytest
+
+from rag_doc_manager.search import cache
+from rag_doc_manager.search.base import SearchResponse, SearchResult
+from rag_doc_manager.search.cache import SemanticQueryCache
+
+
+def _cosine_distance(left, right):
+    left, right = array.array('f', left), array.array('f', right)
+    dot = sum(a * b for a, b in zip(left, right))
+    norms = math.sqrt(sum(a * a for a in left)) * math.sqrt(sum(b * b for b in right))
+    return 1.0 - dot / norms
+
+
+def _sqlite_vec_loads():
+    try:
+        cache._load_vector_functions(sqlite3.connect(":memory:"))
+    except ImportError:
+        return False
+    return True
+
+
+@pytest.fixture(autouse=True)
+def vector_functions(monkeypatch):
+    # without a sqlite3 able to load sqlite-vec, its cosine distance is computed in Python
+    if not _sqlite_vec_loads():
+        monkeypatch.setattr(
+            cache, "_load_vector_functions",
+            lambda connection: connection.create_function("vec_distance_cosine", 2, _cosine_distance, deterministic=True)
+        )
+
+
+@pytest.fixture(params=["memory", "file"])
+def semantic_cache(request, tmp_path):
+    path = ":memory:" if request.param == "memory" else str(tmp_path / "semantic_cache.db")
+    return SemanticQueryCache(path=path, similarity_threshold=0.9)
+
+
+def _response(content):
+    result = SearchResult(document_id="document", content=content, score=1.0)
+    return SearchResponse(results=[result], total_results=1, query_time_ms=1.0)
+
+
+def test_similar_query_is_a_hit(semantic_cache):
+    namespace = SemanticQueryCache.namespace("index", "scope eq 'global'", 5)
+    semantic_cache.set(namespace, [1.0, 0.0, 0.0], _response("cached"))
+
+    cached = semantic_cache.get(namespace, [0.99, 0.05, 0.0])
+
+    assert cached is not None
+    assert cached.results[0].content == "cached"
+
+
+def test_dissimilar_query_is_a_miss(semantic_cache):
+    namespace = SemanticQueryCache.namespace("index")
+    semantic_cache.set(namespace, [1.0, 0.0, 0.0], _response("cached"))
+
+    assert semantic_cache.get(namespace, [0.0, 1.0, 0.0]) is None
+    assert semantic_cache.get(SemanticQueryCache.namespace("index", "other"), [1.0, 0.0, 0.0]) is None
+
+
+def test_expired_responses_are_not_served(semantic_cache, monkeypatch):
+    namespace = SemanticQueryCache.namespace("index")
+    semantic_cache.set(namespace, [1.0, 0.0, 0.0], _response("cached"))
+
+    later = cache.time.time() + semantic_cache.ttl + 1
+    monkeypatch.setattr(cache.time, "time", lambda: later)
+
+    assert semantic_cache.get(namespace, [1.0, 0.0, 0.0]) is None
+
+
+def test_namespaces_are_isolated(semantic_cache):
+    first = SemanticQueryCache.namespace("index", "account_id eq 'a'")
+    second = SemanticQueryCache.namespace("index", "account_id eq 'b'")
+    semantic_cache.set(first, [1.0, 0.0, 0.0], _response("first"))
+    semantic_cache.set(second, [1.0, 0.0, 0.0], _response("second"))
+
+    assert semantic_cache.get(first, [1.0, 0.0, 0.0]).results[0].content == "first"
+    assert semantic_cache.get(second, [1.0, 0.0, 0.0]).results[0].content == "second"
+
+
+def test_invalidate_drops_only_the_namespaces_of_the_index(semantic_cache):
+    semantic_cache.set(SemanticQueryCache.namespace("index", "a"), [1.0, 0.0, 0.0], _response("a"))
+    semantic_cache.set(SemanticQueryCache.namespace("index", "b"), [1.0, 0.0, 0.0], _response("b"))
+    # an index whose name starts with the name of the invalidated one
+    semantic_cache.set(SemanticQueryCache.namespace("index-2", "a"), [1.0, 0.0, 0.0], _response("other"))
+
+    assert semantic_cache.invalidate("index") == 2
+
+    assert semantic_cache.get(SemanticQueryCache.namespace("index", "a"), [1.0, 0.0, 0.0]) is None
+    assert semantic_cache.get(SemanticQueryCache.namespace("index-2", "a"), [1.0, 0.0, 0.0]) is not None
+
+
+def test_semantic_cache_is_disabled_without_setting(monkeypatch):
+    monkeypatch.delenv(cache.SEMANTIC_CACHE_PATH_ENV, raising=False)
+    monkeypatch.setattr(cache, "_semantic_cache", None)
+
+    assert cache.get_semantic_cache() is None
+
+
+def test_semantic_cache_is_shared_by_the_process(monkeypatch):
+    monkeypatch.setenv(cache.SEMANTIC_CACHE_PATH_ENV, ":memory:")
+    monkeypatch.setattr(cache, "_semantic_cache", None)
+
+    assert cache.get_semantic_cache() is cache.get_semantic_cache()
@@ -1,37 +1,67 @@
 import logging
+import threading
+from typing import Iterator, List, Set, Tuple
 
 from pymongo import MongoClient
-from pymongo.errors import DuplicateKeyError
+from pymongo.errors import DuplicateKeyError, PyMongoError
 
 
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 
 class CosmosDBClient:
 
     _mongo_client = None
+    _mongo_client_lock = threading.Lock()
+    # Connections kept open in the pool, so the first requests of the managers skip the TCP/TLS handshakes
+    _MIN_POOL_SIZE = 4
+    # (database, collection, primary key) whose primary key index has been ensured by this process
+    _indexed: Set[Tuple[str, str, str]] = set()
 
     def __init__(self, connection_string: str, database_name: str, collection_name: str, primary_key: str = "_id"):
         """Initialize connection to Cosmos DB using the MongoDB API via PyMongo. 
         """
         if CosmosDBClient._mongo_client is None:
-            # Only create MongoClient once
-            CosmosDBClient._mongo_client = MongoClient(connection_string)
+            # Only create MongoClient once, managers are built concurrently by the request threads
+            with CosmosDBClient._mongo_client_lock:
+                if CosmosDBClient._mongo_client is None:
+                    CosmosDBClient._mongo_client = MongoClient(connection_string, minPoolSize=CosmosDBClient._MIN_POOL_SIZE)
         
         self.client = CosmosDBClient._mongo_client
         self.database = self.client[database_name]
         self.collection = self.database[collection_name]
         self.primary_key = primary_key
 
+    def ensure_primary_key_index(self) -> bool:
+        """Index the primary key of the collection, every point read and write filters on it.
+        Run at startup by the application lifespan, not on the request path;
+        only done once per process. The queries assume the primary key is also the shard key
+        of the collection, otherwise they fan out to every partition.
+
+        Returns:
+        -------
+            bool: True if the index exists, False if it could not be created.
+        """
+        index_key = (self.database.name, self.collection.name, self.primary_key)
+        if self.primary_key == "_id" or index_key in CosmosDBClient._indexed:
+            return True
+        try:
+            # a plain index, uniqueness of the existing records is left to the writes
+            self.collection.create_index([(self.primary_key, 1)])
+        except PyMongoError as e:
+            logger.error(f"Could not index {self.collection.name}.{self.primary_key}: {e}")
+            return False
+        CosmosDBClient._indexed.add(index_key)
+        return True
+
     def insert_record(self, record_data: dict, record_id: str)-> bool:
         """Insert or replace a record"""
         try:
             # Upsert: Insert if not exists, update if exists
             self.collection.replace_one({self.primary_key: record_id}, record_data, upsert=True)
         except DuplicateKeyError as e:
-            print(f"Duplicate record found: {e}")
+            logger.warning(f"Duplicate record found: {e}")
 
     def get_record(self, record_id: str) -> dict:
         """Retrieve a record by ID. If not found, return None"""
@@ -41,9 +71,20 @@ class CosmosDBClient:
         """Query records with MongoDB query syntax. This is an implementation of the find method in PyMongo."""
         return list(self.collection.find(query))
 
+    # Record ids fetched per cursor round-trip by iter_records
+    _ITER_BATCH_SIZE = 1000
+
+    def iter_records(self) -> Iterator[str]:
+        """Iterate over all the record ids in the collection, fetched in batches from a cursor projected on the primary key."""
+        projection = {self.primary_key: 1} if self.primary_key == "_id" else {self.primary_key: 1, "_id": 0}
+        cursor = self.collection.find({}, projection).batch_size(CosmosDBClient._ITER_BATCH_SIZE)
+        for record in cursor:
+            if self.primary_key in record:
+                yield record[self.primary_key]
+
     def get_records(self) -> list:
-        """Get all record ids in the collection. This is an implementation of the distinct method in PyMongo."""
-        return list(self.collection.distinct(self.primary_key))
+        """Get all record ids in the collection. Prefer iter_records, which does not hold all the ids in memory."""
+        return list(self.iter_records())
 
     def update_or_create_record(self, record_id: str, updated_data: dict) -> bool:
         """Update an existing record or create a new one if it doesn't exist"""
@@ -64,6 +105,19 @@ class CosmosDBClient:
             logger.error(f"An error occurred when updating record: {str(e)}")
             return False
 
+    def patch_record(self, record_id: str, update: dict) -> bool:
+        """Apply update operators (e.g. $push, $pull) to an existing record in a single round-trip, without reading it first.
+        Returns False if the record does not exist."""
+        result = self.collection.update_one({self.primary_key: record_id}, update)
+        return result.matched_count > 0
+
+    def bulk_delete(self, record_ids: List[str]) -> int:
+        """Delete several records by ID in one round-trip. Returns the number of deleted records."""
+        if not record_ids:
+            return 0
+        result = self.collection.delete_many({self.primary_key: {"$in": list(record_ids)}})
+        return result.deleted_count
+
     def delete_record(self, record_id: str)-> bool:
         """Delete a record by ID"""
         result = self.collection.delete_one({self.primary_key: record_id})
@@ -73,9 +127,9 @@ class CosmosDBClient:
         """Delete the entire collection"""
         try:
             self.database.drop_collection(self.collection.name)
-            print(f"Collection {self.collection.name} deleted successfully.")
+            logger.info(f"Collection {self.collection.name} deleted successfully.")
         except Exception as e:
-            print(f"Error deleting collection: {e}")
+            logger.error(f"Error deleting collection: {e}")
 
     def close(self):
         """Close the connection to the database"""
@@ -0,0 +1,49 @@
+from dataclasses import dataclass
+
+from rag_doc_manager.storage.database_manager.cosmosdb_manager import CosmosDBClient
+
+
+@dataclass
+class FakeDeleteResult:
+    deleted_count: int
+
+
+class FakeCollection:
+    """In-memory stand-in for a pymongo collection, counting the round-trips."""
+
+    def __init__(self, records):
+        self.records = list(records)
+        self.calls = 0
+
+    def delete_many(self, query):
+        self.calls += 1
+        ((field, condition),) = query.items()
+        kept = [record for record in self.records if record.get(field) not in condition["$in"]]
+        deleted_count = len(self.records) - len(kept)
+        self.records = kept
+        return FakeDeleteResult(deleted_count=deleted_count)
+
+
+def make_client(collection):
+    # no MongoClient, bulk_delete only needs the collection and its primary key
+    client = object.__new__(CosmosDBClient)
+    client.collection = collection
+    client.primary_key = "index_name"
+    return client
+
+
+def test_bulk_delete_deletes_the_records_in_one_round_trip():
+    collection = FakeCollection([{"index_name": name} for name in ["a", "b", "c"]])
+
+    assert make_client(collection).bulk_delete(["a", "c", "missing"]) == 2
+
+    assert collection.records == [{"index_name": "b"}]
+    assert collection.calls == 1
+
+
+def test_bulk_delete_of_no_records_skips_the_round_trip():
+    collection = FakeCollection([{"index_name": "a"}])
+
+    assert make_client(collection).bulk_delete([]) == 0
+
+    assert collection.calls == 0
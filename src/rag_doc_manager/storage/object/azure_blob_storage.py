@@ -1,7 +1,10 @@
-from typing import Optional, Union, Dict
+from typing import IO, Optional, Union, Dict
 import logging
 from pathlib import Path
 import datetime
+import hashlib
+import os
+from urllib.parse import unquote, urlparse
 from azure.storage.blob import BlobServiceClient
 from azure.storage.blob import ContentSettings
 from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
@@ -11,19 +14,46 @@ from .base import ObjectStorage
 
 logger = logging.getLogger(__name__)
 
+# Simple mapping of common file extensions to content types, built once at import
+_CONTENT_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    ".txt": "text/plain",
+    ".csv": "text/csv",
+    ".json": "application/json",
+    ".html": "text/html",
+    ".htm": "text/html",
+    ".xml": "application/xml",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".zip": "application/zip",
+    ".md": "text/markdown",
+}
+
 class AzureBlobStorage(ObjectStorage):
     """
     Azure Blob Storage implementation of the ObjectStorage interface.
     Handles storing and retrieving documents from Azure Blob Storage.
     """
 
+    # Files above the single put size are uploaded as blocks of that size, max_concurrency blocks at a time
+    _MAX_SINGLE_PUT_SIZE = 4 * 1024 * 1024
+    _MAX_BLOCK_SIZE = 4 * 1024 * 1024
+    # Read size when hashing files
+    _HASH_CHUNK_SIZE = 1024 * 1024
+
     def __init__(
         self,
         connection_string: str,
         container_name: str,
         account_name: Optional[str] = None,
         account_key: Optional[str] = None,
-        create_container_if_not_exists: bool = True
+        create_container_if_not_exists: bool = True,
+        max_concurrency: int = 8,
+        skip_unchanged_uploads: bool = False
     ):
         """
         Initialize the Azure Blob Storage client.
@@ -42,6 +72,12 @@ class AzureBlobStorage(ObjectStorage):
             (Required for SAS token generation if not in connection string)
         create_container_if_not_exists : bool, optional
             Whether to create the container if it doesn't exist, by default True
+        max_concurrency : int, optional
+            Number of parallel connections used to upload the blocks of large files, by default 8
+        skip_unchanged_uploads : bool, optional
+            Whether to skip the upload of a file whose blob already has the same content (MD5), by default False.
+            When set, the file is hashed before the upload (an extra read) and the blob properties are fetched;
+            the metadata of a skipped blob is still refreshed.
         """
 
         self.connection_string = connection_string
@@ -49,6 +85,11 @@ class AzureBlobStorage(ObjectStorage):
         self.account_name = account_name
         self.account_key = account_key
         self.create_container_if_not_exists = create_container_if_not_exists
+        self.max_concurrency = max_concurrency
+        self.skip_unchanged_uploads = skip_unchanged_uploads
+        # built on first use and reused, so the connection string is parsed and the HTTP pipeline built once
+        self._blob_service_client: Optional[BlobServiceClient] = None
+        self._container_checked = False
 
         if not self.account_name or not self.account_key:
             parts = self.connection_string.split(';')
@@ -62,34 +103,48 @@ class AzureBlobStorage(ObjectStorage):
 
     def _get_blob_service_client(self) -> BlobServiceClient:
         """
-        Get the Azure Blob Service client.
+        Get the Azure Blob Service client, shared by all the operations of the instance.
 
         Returns
         -------
         BlobServiceClient
             Azure Blob Service client
         """
-        return BlobServiceClient.from_connection_string(self.connection_string)
+        if self._blob_service_client is None:
+            self._blob_service_client = BlobServiceClient.from_connection_string(
+                self.connection_string,
+                max_single_put_size=AzureBlobStorage._MAX_SINGLE_PUT_SIZE,
+                max_block_size=AzureBlobStorage._MAX_BLOCK_SIZE
+            )
+        return self._blob_service_client
 
     def _ensure_container_exists(self) -> None:
         """
         Ensure the container exists, creating it if necessary.
         """
 
-        if self.create_container_if_not_exists:
+        # the container only needs to be checked once per instance
+        if self.create_container_if_not_exists and not self._container_checked:
 
-            with self._get_blob_service_client() as blob_service_client:
-                try:
+            blob_service_client = self._get_blob_service_client()
+            try:
 
-                    container_client = blob_service_client.get_container_client(self.container_name)
-                    container_client.create_container()
-                    logger.info(f"Container {self.container_name} created")
+                container_client = blob_service_client.get_container_client(self.container_name)
+                container_client.create_container()
+                logger.info(f"Container {self.container_name} created")
 
-                except ResourceExistsError:
-                    logger.info(f"Container {self.container_name} already exists")
+            except ResourceExistsError:
+                logger.info(f"Container {self.container_name} already exists")
+            self._container_checked = True
 
 
-    def upload_file(self, file_path: Union[str, Path], destination_prefix: str, additional_metadata: Dict[str, str]) -> str:
+    def upload_file(
+        self,
+        file_path: Union[str, Path],
+        destination_prefix: str,
+        additional_metadata: Dict[str, str],
+        data: Optional[Union[bytes, IO[bytes]]] = None
+    ) -> str:
         """
         Upload a file to Azure Blob Storage.
 
@@ -100,6 +155,9 @@ class AzureBlobStorage(ObjectStorage):
         destination_prefix : str
             Prefix (folder/path) within the container where the file should be stored
         additional_metadata: Dict[str, str]
+        data : Optional[Union[bytes, IO[bytes]]], optional
+            Content of the file if the caller already holds it (bytes or a binary stream), by default None.
+            When given, it is uploaded directly and file_path is only used for the blob name and content type.
         Returns
         -------
         str
@@ -116,35 +174,79 @@ class AzureBlobStorage(ObjectStorage):
         content_type = self._get_content_type(file_path)
 
 
-        with self._get_blob_service_client() as blob_service_client:
-            blob_client = blob_service_client.get_blob_client(
-                container=self.container_name,
-                blob=blob_name
-            )
-
-            content_settings = ContentSettings(content_type=content_type)
+        blob_service_client = self._get_blob_service_client()
+        blob_client = blob_service_client.get_blob_client(
+            container=self.container_name,
+            blob=blob_name
+        )
 
-            metadata = {
-                'original_filename': file_path.name,
-                'upload_timestamp': datetime.datetime.now(datetime.UTC).isoformat()
-            }
-
-            metadata.update(additional_metadata)
+        metadata = {
+            'original_filename': file_path.name,
+            'upload_timestamp': datetime.datetime.now(datetime.UTC).isoformat()
+        }
 
-            try:
-                with open(file_path, 'rb') as data:
+        metadata.update(additional_metadata)
+
+        try:
+            if data is None:
+                with open(file_path, 'rb') as file:
+                    content_md5 = None
+                    if self.skip_unchanged_uploads:
+                        content_md5 = self._hash_stream(file)
+                        if self._is_unchanged(blob_client, content_md5):
+                            return self._skip_upload(blob_client, metadata, file_path)
+                        file.seek(0)
                     blob_client.upload_blob(
-                        data,
+                        file,
+                        # with the length known the SDK splits the blocks up front instead of buffering the stream
+                        length=os.fstat(file.fileno()).st_size,
                         overwrite=True,
-                        content_settings=content_settings,
-                        metadata=metadata
+                        content_settings=ContentSettings(content_type=content_type, content_md5=content_md5),
+                        metadata=metadata,
+                        max_concurrency=self.max_concurrency
                     )
-                    logger.info(f"Uploaded {file_path} to {blob_name}")
-                return blob_client.url
-
-            except Exception as e:
-                logger.error(f"Error uploading {file_path}: {e}")
-                raise
+            else:
+                # streams are uploaded as they are read, only in-memory content can be hashed up front
+                content_md5 = None
+                if self.skip_unchanged_uploads and isinstance(data, bytes):
+                    content_md5 = hashlib.md5(data).digest()
+                    if self._is_unchanged(blob_client, content_md5):
+                        return self._skip_upload(blob_client, metadata, file_path)
+                content_settings = ContentSettings(content_type=content_type, content_md5=content_md5)
+                blob_client.upload_blob(
+                    data,
+                    overwrite=True,
+                    content_settings=content_settings,
+                    metadata=metadata,
+                    max_concurrency=self.max_concurrency
+                )
+            logger.info(f"Uploaded {file_path} to {blob_name}")
+            return blob_client.url
+
+        except Exception as e:
+            logger.error(f"Error uploading {file_path}: {e}")
+            raise
+
+    def _hash_stream(self, stream: IO[bytes]) -> bytes:
+        """MD5 of the content of a binary stream, read in chunks."""
+        content_hash = hashlib.md5()
+        for chunk in iter(lambda: stream.read(AzureBlobStorage._HASH_CHUNK_SIZE), b''):
+            content_hash.update(chunk)
+        return content_hash.digest()
+
+    def _is_unchanged(self, blob_client, content_md5: bytes) -> bool:
+        """Check if the blob already exists with the given content MD5, in a single properties request."""
+        try:
+            stored_md5 = blob_client.get_blob_properties().content_settings.content_md5
+        except ResourceNotFoundError:
+            return False
+        return stored_md5 is not None and bytes(stored_md5) == content_md5
+
+    def _skip_upload(self, blob_client, metadata: Dict[str, str], file_path: Path) -> str:
+        """Refresh the metadata of an unchanged blob instead of uploading its content again."""
+        blob_client.set_blob_metadata(metadata)
+        logger.info(f"{blob_client.blob_name} is unchanged, skipped the upload of {file_path} and refreshed its metadata")
+        return blob_client.url
 
     def delete_file(self, file_url: str) -> bool:
         """
@@ -164,23 +266,23 @@ class AzureBlobStorage(ObjectStorage):
         blob_name = self._extract_blob_name_from_url(file_url)
 
         # Delete the blob
-        with self._get_blob_service_client() as blob_service_client:
-            blob_client = blob_service_client.get_blob_client(
-                container=self.container_name,
-                blob=blob_name
-            )
-
-            try:
-                blob_client.delete_blob()
-                logger.info(f"Deleted {blob_name}")
-                return True
-
-            except ResourceNotFoundError:
-                logger.warning(f"Blob {blob_name} not found, nothing to delete")
-                return False
-            except Exception as e:
-                logger.error(f"Error deleting {blob_name}: {e}")
-                return False
+        blob_service_client = self._get_blob_service_client()
+        blob_client = blob_service_client.get_blob_client(
+            container=self.container_name,
+            blob=blob_name
+        )
+
+        try:
+            blob_client.delete_blob()
+            logger.info(f"Deleted {blob_name}")
+            return True
+
+        except ResourceNotFoundError:
+            logger.warning(f"Blob {blob_name} not found, nothing to delete")
+            return False
+        except Exception as e:
+            logger.error(f"Error deleting {blob_name}: {e}")
+            return False
 
     def _extract_blob_name_from_url(self, file_url: str) -> str:
         """
@@ -196,19 +298,20 @@ class AzureBlobStorage(ObjectStorage):
         str
             Blob name
         """
-        # Handle URLs with SAS tokens
-        if "?" in file_url:
-            file_url = file_url.split("?")[0]
+        # the path excludes the query string (SAS token), blob URLs percent-encode the blob name
+        path = unquote(urlparse(file_url).path).lstrip('/')
+        prefix = f"{self.container_name}/"
+
+        if path.startswith(prefix):
+            return path[len(prefix):]
 
-        # Extract blob name
-        parts = file_url.split("/")
-        container_index = parts.index(self.container_name) if self.container_name in parts else -1
+        # emulator URLs carry the account name before the container
+        container_index = path.find(f"/{prefix}")
+        if container_index != -1:
+            return path[container_index + len(prefix) + 1:]
 
-        if 0 <= container_index < len(parts) - 1:
-            return "/".join(parts[container_index + 1:])
-        else:
-            # If the container name is not in the URL, assume the last part is the blob name
-            return parts[-1]
+        # If the container name is not in the URL, assume the last part is the blob name
+        return path.rsplit('/', 1)[-1]
 
     def _get_content_type(self, file_path: Path) -> str:
         """
@@ -224,23 +327,4 @@ class AzureBlobStorage(ObjectStorage):
         str
             Content type
         """
-        # Simple mapping of common file extensions to content types
-        content_type_map = {
-            ".pdf": "application/pdf",
-            ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            ".pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
-            ".txt": "text/plain",
-            ".csv": "text/csv",
-            ".json": "application/json",
-            ".html": "text/html",
-            ".htm": "text/html",
-            ".xml": "application/xml",
-            ".png": "image/png",
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".zip": "application/zip",
-            ".md": "text/markdown",
-        }
-
-        return content_type_map.get(file_path.suffix.lower(), "application/octet-stream")
\ No newline at end of file
+        return _CONTENT_TYPES.get(file_path.suffix.lower(), "application/octet-stream")
\ No newline at end of file
@@ -1,6 +1,6 @@
 
 from abc import ABC, abstractmethod
-from typing import Union, Dict
+from typing import IO, Optional, Union, Dict
 from pathlib import Path
 
 class ObjectStorage(ABC):
@@ -12,7 +12,13 @@ class ObjectStorage(ABC):
     
     
     @abstractmethod
-    def upload_file(self, file_path: Union[str, Path], destination_prefix: str, additional_metadata: Dict[str, str]) -> str:
+    def upload_file(
+        self,
+        file_path: Union[str, Path],
+        destination_prefix: str,
+        additional_metadata: Dict[str, str],
+        data: Optional[Union[bytes, IO[bytes]]] = None
+    ) -> str:
         """
         Upload a file to object storage.
         
@@ -23,6 +29,8 @@ class ObjectStorage(ABC):
         destination_prefix : str
             Prefix (folder/path) within the storage where the file should be stored
         additional_metadata: Dict[str, str]
+        data : Optional[Union[bytes, IO[bytes]]], optional
+            Content of the file if already in memory or available as a stream, to avoid re-reading file_path
         Returns
         -------
         str
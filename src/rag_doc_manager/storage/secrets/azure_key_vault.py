@@ -1,4 +1,7 @@
-from typing import Any, Dict, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
 from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
 from azure.identity import ClientSecretCredential
@@ -9,17 +12,45 @@ from rag_doc_manager.storage.secrets.base import SecretStore, SecretStoreConnect
 
 
 class AzureKeyVaultStore(SecretStore):
+
+    # Secrets are shared by every store pointing at the same vault, keyed by (vault_url, secret name)
+    _secret_cache: Dict[Tuple[str, str], Tuple[str, float]] = {}
+    _secret_cache_lock = threading.Lock()
+    secret_cache_ttl: float = 3600.0  # seconds
+    _MAX_CONCURRENT_FETCHES = 8
+    # Clients of the stores using the process credentials, shared per vault so they reuse one connection pool
+    _shared_clients: Dict[str, SecretClient] = {}
+    _shared_clients_lock = threading.Lock()
+
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         super().__init__(config)
-        self._authenticate()
-
-    def _authenticate(self):
-        try:
-            if not self.config.get('vault_url'):
-                raise ValueError('vault_url is required to initialize AzureKeyVaultStore')
+        if not self.config.get('vault_url'):
+            self.logger.error("Failed to initialize Azure Key Vault client: vault_url is required")
+            raise SecretStoreConnectionError("Failed to initialize Azure Key Vault client: vault_url is required to initialize AzureKeyVaultStore")
+        self.vault_url = self.config.get('vault_url')
+        # built by _authenticate on first use, cached secrets never need it
+        self._client: Optional[SecretClient] = None
+        self._client_lock = threading.Lock()
 
-            self.vault_url = self.config.get('vault_url')
+    @property
+    def client(self) -> SecretClient:
+        if self._client is None:
+            # stores given their own credentials keep their own client
+            uses_own_credential = self.config.get('credential') or 'client_secret' in self.config
+            lock = self._client_lock if uses_own_credential else AzureKeyVaultStore._shared_clients_lock
+            with lock:
+                if uses_own_credential:
+                    client = self._client or self._authenticate()
+                else:
+                    client = AzureKeyVaultStore._shared_clients.get(self.vault_url)
+                    if client is None:
+                        client = self._authenticate()
+                        AzureKeyVaultStore._shared_clients[self.vault_url] = client
+                self._client = client
+        return self._client
 
+    def _authenticate(self) -> SecretClient:
+        try:
             if self.config.get('credential'):
                 # use provided credential object directly
                 credential = self.config['credential']
@@ -33,7 +64,7 @@ class AzureKeyVaultStore(SecretStore):
                 credential_manager = AzureCredentialManager()
                 credential = credential_manager.get_credentials()
 
-            self.client = SecretClient(
+            return SecretClient(
                 vault_url=self.vault_url,
                 credential=credential
             )
@@ -42,6 +73,42 @@ class AzureKeyVaultStore(SecretStore):
             raise SecretStoreConnectionError(f"Failed to initialize Azure Key Vault client: {str(e)}")
 
     def get_secret(self, key: str) -> str:
+        cache_key = (self.vault_url, key)
+        cached = AzureKeyVaultStore._secret_cache.get(cache_key)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        value = self._fetch_secret(key)
+        with AzureKeyVaultStore._secret_cache_lock:
+            AzureKeyVaultStore._secret_cache[cache_key] = (value, time.monotonic() + self.secret_cache_ttl)
+        return value
+
+    def get_secrets(self, keys: List[str]) -> Dict[str, str]:
+        """Get several secrets, fetching the ones missing from the cache concurrently (one round-trip of latency instead of N)."""
+        now = time.monotonic()
+        secrets = {}
+        missing = []
+        for key in keys:
+            cached = AzureKeyVaultStore._secret_cache.get((self.vault_url, key))
+            if cached and cached[1] > now:
+                secrets[key] = cached[0]
+            else:
+                missing.append(key)
+
+        if len(missing) == 1:
+            secrets[missing[0]] = self.get_secret(missing[0])
+        elif missing:
+            with ThreadPoolExecutor(max_workers=min(len(missing), self._MAX_CONCURRENT_FETCHES)) as executor:
+                secrets.update(zip(missing, executor.map(self.get_secret, missing)))
+
+        return secrets
+
+    def invalidate(self, key: str) -> None:
+        """Drop a secret from the cache, e.g. after it was rotated outside of this process."""
+        with AzureKeyVaultStore._secret_cache_lock:
+            AzureKeyVaultStore._secret_cache.pop((self.vault_url, key), None)
+
+    def _fetch_secret(self, key: str) -> str:
         try:
             secret = self.client.get_secret(key)
             return secret.value
@@ -56,6 +123,7 @@ class AzureKeyVaultStore(SecretStore):
     def set_secret(self, key: str, value: str) -> bool:
         try:
             self.client.set_secret(key, value)
+            self.invalidate(key)
             return True
         except HttpResponseError as e:
             if hasattr(e, 'status_code'):
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 class SecretstoreError(Exception):
     pass
@@ -30,6 +30,10 @@ class SecretStore(ABC):
     @abstractmethod
     def set_secret(self, key: str, value: str) -> bool:
         pass
+
+    def get_secrets(self, keys: List[str]) -> Dict[str, str]:
+        """Get several secrets at once. Stores that can fetch concurrently should override this."""
+        return {key: self.get_secret(key) for key in keys}
     
     
     
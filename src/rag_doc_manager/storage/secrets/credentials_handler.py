@@ -1,16 +1,68 @@
+import threading
+import time
+
+from azure.core.credentials import AccessToken
 from azure.identity import DefaultAzureCredential, ManagedIdentityCredential, EnvironmentCredential
 
+
+class _CachingCredential:
+    """
+    Token credential sharing the tokens of a wrapped credential between all its clients.
+
+    Each SDK client only caches the tokens it requested itself, and some credentials of the
+    default chain (e.g. the Azure CLI one) fetch a new token on every call. Tokens are kept
+    per scope and only requested again when they are close to expiry.
+    """
+
+    # Tokens are refreshed when they expire in less than that many seconds
+    _REFRESH_MARGIN = 300
+
+    def __init__(self, credential):
+        self._credential = credential
+        # (scopes, enable_cae) -> token, CAE and non-CAE tokens of a scope are distinct
+        self._tokens: dict[tuple[tuple[str, ...], bool], AccessToken] = {}
+        self._lock = threading.Lock()
+
+    def get_token(self, *scopes: str, **kwargs) -> AccessToken:
+        # only enable_cae is part of the cache key, tokens requested with any other option (claims, tenant_id, ...) are not shared
+        if any(value for name, value in kwargs.items() if name != 'enable_cae'):
+            return self._credential.get_token(*scopes, **kwargs)
+
+        key = (scopes, bool(kwargs.get('enable_cae')))
+        token = self._tokens.get(key)
+        if token is None or token.expires_on - time.time() < self._REFRESH_MARGIN:
+            # one refresh per scope at a time, the other callers get the new token
+            with self._lock:
+                token = self._tokens.get(key)
+                if token is None or token.expires_on - time.time() < self._REFRESH_MARGIN:
+                    token = self._credential.get_token(*scopes, **kwargs)
+                    self._tokens[key] = token
+        return token
+
+    def close(self) -> None:
+        self._credential.close()
+
 class AzureCredentialManager:
-    _instance = None
+    # One manager per credential flavour, keyed by (use_managed_identity, use_environment)
+    _instances: dict[tuple[bool, bool], "AzureCredentialManager"] = {}
+    _lock = threading.Lock()
 
     def __new__(cls, use_managed_identity=False, use_environment=False):
         """
-        Singleton pattern: ensures only one instance of the credential manager.
+        Singleton pattern: ensures only one instance of the credential manager per credential flags.
+        The credential (and its token cache) is shared by Key Vault, AI Search and the other clients of the process.
         """
-        if not cls._instance:
-            cls._instance = super().__new__(cls)
-            cls._instance._initialize_credentials(use_managed_identity, use_environment)
-        return cls._instance
+        key = (bool(use_managed_identity), bool(use_environment))
+        instance = cls._instances.get(key)
+        if instance is None:
+            # the first clients are built concurrently by the request threads, only one may build the credential
+            with cls._lock:
+                instance = cls._instances.get(key)
+                if instance is None:
+                    instance = super().__new__(cls)
+                    instance._initialize_credentials(use_managed_identity, use_environment)
+                    cls._instances[key] = instance
+        return instance
 
     def _initialize_credentials(self, use_managed_identity, use_environment):
         """
@@ -19,13 +71,14 @@ class AzureCredentialManager:
         """
         if use_managed_identity:
             # Use Managed Identity credentials (for Azure VM, App Service, etc.)
-            self.credentials = ManagedIdentityCredential()
+            credentials = ManagedIdentityCredential()
         elif use_environment:
             # Use EnvironmentCredential (typically from AZURE_CLIENT_ID, AZURE_TENANT_ID, and AZURE_CLIENT_SECRET)
-            self.credentials = EnvironmentCredential()
+            credentials = EnvironmentCredential()
         else:
             # Default credential flow that checks multiple sources
-            self.credentials = DefaultAzureCredential()
+            credentials = DefaultAzureCredential()
+        self.credentials = _CachingCredential(credentials)
 
     def get_credentials(self):
         """
@@ -1,62 +1,183 @@
-import magic
+import hashlib
 import logging
-from typing import Any
-from pathlib import Path
-import uuid
+import os
+import threading
+from typing import TYPE_CHECKING, Any, AsyncIterator
+
+import aiofiles
+
+if TYPE_CHECKING:
+    import magic
 
 logger = logging.getLogger(__name__)
 
+# Number of leading bytes used for file type detection, the signatures and the libmagic rules only look at the head
+_DETECTION_HEAD_SIZE = 4096
+
+# Directories already created by this process, so hot upload paths skip the mkdir syscalls
+_known_dirs: set[str] = set()
+_dirs_lock = threading.Lock()
+
+# Leading bytes of the common document types, checked before falling back on libmagic
+_SIGNATURES = (
+    (b'%PDF', 'application/pdf', '.pdf'),
+    # ZIP archives, also the container of the Office Open XML files (see _detect_zip_file)
+    (b'PK\x03\x04', 'application/zip', '.zip'),
+    (b'\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1', 'application/msword', '.doc'),
+)
+# The signatures keyed on their first 4 bytes, so a file is matched with a single dict lookup
+_SIGNATURES_BY_HEAD = {signature[:4]: (signature, mime_type, extension) for signature, mime_type, extension in _SIGNATURES}
+
+# Extension of the MIME types reported by libmagic
+_MIME_TO_EXT = {
+    'application/pdf': '.pdf',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': '.docx',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': '.xlsx',
+    'application/msword': '.doc',
+    'text/plain': '.txt',
+    'text/csv': '.csv',
+    'text/markdown': '.md',
+    'application/json': '.json',
+}
+
+# libmagic results of recent heads, keyed on their digest, so re-uploads of the same document skip libmagic
+_MAGIC_CACHE_MAXSIZE = 4096
+_magic_results: dict[bytes, tuple[str, str]] = {}
+_magic_results_lock = threading.Lock()
+
+# libmagic loads and compiles its whole database per instance, so one instance is shared by the process
+_magic: 'magic.Magic | None' = None
+_magic_lock = threading.Lock()
+
+
+def _get_magic() -> 'magic.Magic':
+    """Return the shared MIME detector, loading libmagic and its database on first use."""
+    global _magic
+    if _magic is None:
+        with _magic_lock:
+            if _magic is None:
+                # imported here so uploads matched on their signature never load libmagic
+                import magic
+                # from_buffer serializes its calls with a lock of the instance, so it can be shared between threads
+                _magic = magic.Magic(mime=True)
+    return _magic
+
+
+def ensure_dir(path: str | os.PathLike) -> None:
+    """Create a directory (and its parents) unless this process has already done so."""
+    path = os.fspath(path)
+    if path in _known_dirs:
+        return
+    os.makedirs(path, exist_ok=True)
+    with _dirs_lock:
+        _known_dirs.add(path)
+
+
+def _detect_zip_file(content: bytes) -> tuple[str, str]:
+    # Office Open XML files are ZIP-based, their part names appear in the head of the archive
+    if content.find(b'word/', 0, _DETECTION_HEAD_SIZE) != -1:
+        return 'application/vnd.openxmlformats-officedocument.wordprocessingml.document', '.docx'
+    elif content.find(b'xl/', 0, _DETECTION_HEAD_SIZE) != -1:
+        return 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', '.xlsx'
+    return 'application/zip', '.zip'
+
+
+def _detect_file_from_signature(content: bytes) -> tuple[str, str] | None:
+    """Match the common document types on the head of the file, None when no signature matches."""
+    match = _SIGNATURES_BY_HEAD.get(content[:4])
+    if match is None:
+        return None
+    signature, mime_type, extension = match
+    # longer signatures (OLE) are checked in full
+    if len(signature) > 4 and not content.startswith(signature):
+        return None
+    if extension == '.zip':
+        return _detect_zip_file(content)
+    return mime_type, extension
+
 
-def save_bytes_as_file(file_content: bytes, parent_dir: Path, file_name: str) -> dict[str, Any]:
-    def detect_file_from_bytes(content: bytes) -> tuple[str, str]:
-        mime_type = 'application/octet-stream'
-        extension = '.bin'
-        try:
-            mime_type = magic.Magic(mime=True).from_buffer(content)
-            mime_to_ext = {
-                'application/pdf': '.pdf',
-                'application/vnd.openxmlformats-officedocument.wordprocessingml.document': '.docx',
-                'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': '.xlsx',
-                'application/msword': '.doc',
-                'text/plain': '.txt',
-                'text/csv': '.csv',
-                'text/markdown': '.md',
-                'application/json': '.json',
-            }
-            extension = mime_to_ext.get(mime_type, '.bin')
-        except Exception as e:
-            logger.error(f"Error detecting MIME type {e}. Using Fallback.")
-
-        # Basic signature detection as fallback
-        if content.startswith(b'%PDF'):
-            return 'application/pdf', '.pdf'
-        elif content.startswith(b'PK\x03\x04'):
-            # Office Open XML files are ZIP-based
-            if b'word/' in content[:4000]:
-                return 'application/vnd.openxmlformats-officedocument.wordprocessingml.document', '.docx'
-            elif b'xl/' in content[:4000]:
-                return 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', '.xlsx'
-            return 'application/zip', '.zip'
-        elif content.startswith(b'\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1'):
-            return 'application/msword', '.doc'
-        return mime_type, extension
+def detect_file_from_bytes(content: bytes) -> tuple[str, str]:
+    # The signatures cover the common uploads and always took precedence, libmagic is only needed for the rest
+    detected = _detect_file_from_signature(content)
+    if detected is not None:
+        return detected
 
+    # libmagic only needs the head, however large the file
+    head = content[:_DETECTION_HEAD_SIZE]
+    head_digest = hashlib.blake2b(head, digest_size=16).digest()
+    detected = _magic_results.get(head_digest)
+    if detected is not None:
+        return detected
+
+    try:
+        mime_type = _get_magic().from_buffer(head)
+    except Exception as e:
+        # failures are not cached, the next upload tries again
+        logger.error("Error detecting MIME type %s. Using Fallback.", e)
+        return 'application/octet-stream', '.bin'
+
+    detected = mime_type, _MIME_TO_EXT.get(mime_type, '.bin')
+    with _magic_results_lock:
+        if len(_magic_results) >= _MAGIC_CACHE_MAXSIZE:
+            # dicts keep insertion order, the oldest result is evicted first
+            del _magic_results[next(iter(_magic_results))]
+        _magic_results[head_digest] = detected
+    return detected
+
+
+def save_bytes_as_file(file_content: bytes, parent_dir: str | os.PathLike, file_name: str) -> dict[str, Any]:
     mime_type, extension = detect_file_from_bytes(content=file_content)
 
-    # TODO: get file name from metadata in the request
-    filename = file_name #f"{uuid.uuid4()}{extension}"
-    file_path = parent_dir / filename
+    # joined as a string, the path is returned as is and no Path is built per upload
+    file_path = os.path.join(os.fspath(parent_dir), file_name)
 
     # Ensure parent directory exists
-    parent_dir.mkdir(parents=True, exist_ok=True)
+    ensure_dir(parent_dir)
 
     with open(file_path, 'wb') as file:
         file.write(file_content)
 
     return {
-        'file_path': str(file_path),  # Convert Path to string for serialization
-        'filename': filename,
+        'file_path': file_path,
+        'filename': file_name,
         'size': len(file_content),
         'mime_type': mime_type,
         'extension': extension
-    }
\ No newline at end of file
+    }
+
+
+async def save_stream_as_file(
+    stream: AsyncIterator[bytes],
+    parent_dir: str | os.PathLike,
+    file_name: str
+) -> dict[str, Any]:
+    """Write an async byte stream (e.g. a request body) to disk chunk by chunk.
+
+    Only the first few KB are kept in memory for file type detection, so memory use does not grow with the file size.
+    Returns the same file info as `save_bytes_as_file`.
+    """
+    file_path = os.path.join(os.fspath(parent_dir), file_name)
+
+    # Ensure parent directory exists
+    ensure_dir(parent_dir)
+
+    head = b''
+    size = 0
+    async with aiofiles.open(file_path, 'wb') as file:
+        async for chunk in stream:
+            if not chunk:
+                continue
+            if len(head) < _DETECTION_HEAD_SIZE:
+                head += chunk[:_DETECTION_HEAD_SIZE - len(head)]
+            size += len(chunk)
+            await file.write(chunk)
+
+    mime_type, extension = detect_file_from_bytes(content=head)
+
+    return {
+        'file_path': file_path,
+        'filename': file_name,
+        'size': size,
+        'mime_type': mime_type,
+        'extension': extension
+    }
@@ -0,0 +1,93 @@
+import pytest
+
+from rag_doc_manager.utils import io
+
+
+class FakeMagic:
+    """Stands in for libmagic, counting the lookups."""
+
+    def __init__(self, mime_type="text/plain"):
+        self.mime_type = mime_type
+        self.calls = 0
+
+    def from_buffer(self, head):
+        self.calls += 1
+        return self.mime_type
+
+
+@pytest.fixture
+def fake_magic(monkeypatch):
+    magic = FakeMagic()
+    monkeypatch.setattr(io, "_get_magic", lambda: magic)
+    monkeypatch.setattr(io, "_magic_results", {})
+    return magic
+
+
+def test_signature_takes_precedence_over_libmagic(fake_magic):
+    assert io.detect_file_from_bytes(b"%PDF-1.7\n...") == ("application/pdf", ".pdf")
+    assert fake_magic.calls == 0
+    assert io._magic_results == {}
+
+
+def test_libmagic_result_is_cached_on_the_head(fake_magic):
+    assert io.detect_file_from_bytes(b"plain text") == ("text/plain", ".txt")
+    assert io.detect_file_from_bytes(b"plain text") == ("text/plain", ".txt")
+    assert fake_magic.calls == 1
+
+    # a different head is a miss
+    io.detect_file_from_bytes(b"other text")
+    assert fake_magic.calls == 2
+
+
+def test_only_the_head_is_part_of_the_cache_key(fake_magic):
+    head = b"a" * io._DETECTION_HEAD_SIZE
+    io.detect_file_from_bytes(head + b"first tail")
+    io.detect_file_from_bytes(head + b"second tail")
+    assert fake_magic.calls == 1
+
+
+def test_libmagic_failures_are_not_cached(monkeypatch):
+    def failing_magic():
+        raise RuntimeError("libmagic unavailable")
+
+    monkeypatch.setattr(io, "_get_magic", failing_magic)
+    monkeypatch.setattr(io, "_magic_results", {})
+    assert io.detect_file_from_bytes(b"plain text") == ("application/octet-stream", ".bin")
+    assert io._magic_results == {}
+
+
+def test_cache_evicts_the_oldest_result(fake_magic, monkeypatch):
+    monkeypatch.setattr(io, "_MAGIC_CACHE_MAXSIZE", 2)
+    io.detect_file_from_bytes(b"first")
+    io.detect_file_from_bytes(b"second")
+    io.detect_file_from_bytes(b"third")
+    assert len(io._magic_results) == 2
+
+    io.detect_file_from_bytes(b"first")
+    assert fake_magic.calls == 4
+
+
+@pytest.mark.parametrize("content, expected", [
+    (b"%PDF-1.4", ("application/pdf", ".pdf")),
+    (b"PK\x03\x04\x14\x00" + b"\x00" * 24 + b"[Content_Types].xml", ("application/zip", ".zip")),
+    (b"PK\x03\x04\x14\x00" + b"\x00" * 24 + b"word/document.xml", (
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document", ".docx"
+    )),
+    (b"PK\x03\x04\x14\x00" + b"\x00" * 24 + b"xl/workbook.xml", (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx"
+    )),
+    (b"\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1" + b"\x00" * 8, ("application/msword", ".doc")),
+])
+def test_signature_lookup_on_the_first_four_bytes(content, expected):
+    assert io._detect_file_from_signature(content) == expected
+
+
+def test_ole_signature_is_checked_in_full_after_the_lookup():
+    # the first four bytes of the OLE signature alone are not a match
+    assert io._detect_file_from_signature(b"\xD0\xCF\x11\xE0" + b"\x00" * 8) is None
+    assert io._detect_file_from_signature(b"\xD0\xCF\x11\xE0") is None
+
+
+@pytest.mark.parametrize("content", [b"", b"%PD", b"hello world", b"PK\x05\x06"])
+def test_unknown_or_short_heads_have_no_signature(content):
+    assert io._detect_file_from_signature(content) is None